@@ -13,11 +13,19 @@ __status__ = 'Production'
 
 from typing import *
 from pathlib import Path
+from dataclasses import dataclass
+import asyncio
+import contextlib
+import io
 import os
+import signal
+import stat
 import subprocess
 import time
 import shlex
 import shutil
+import tempfile
+import threading
 
 # Common utilities
 from .. import debugUtils
@@ -30,41 +38,338 @@ from ..osUtils import *
 tool_name = 'commonUtils/cmdShellWrapper.py'
 
 
-def exec_cmd(command: str,
-             wait_for_output: bool = True,
-             in_new_window: bool = False,
-             time_out: float = 15):
+@dataclass(frozen=True)
+class CmdResult:
     """
-    Execute command from CMD shell (Windows) or the terminal (macOS & Linux)
+    Result of a command executed with exec_cmd_result or exec_cmd_async.
+    """
+    command: Union[str, List[str]]
+    exit_code: Optional[int]  # None if the process did not complete (could not launch or timed out)
+    stdout: bytes
+    stderr: bytes
+    duration: float  # Seconds
+    timed_out: bool = False
 
-    Notes:
-    - If in_new_window=True, command is launched in a new terminal window and THIS FUNCTION RETURNS IMMEDIATELY.
-      (No output capture in the parent process.)
-    - For simplicity right now, shell=True is always used (per your request).
+    @property
+    def success(self) -> bool:
+        return self.exit_code == 0
+
+    def get_stdout_lines(self) -> List[str]:
+        return decode_output_lines(self.stdout)
+
+    def get_stderr_lines(self) -> List[str]:
+        return decode_output_lines(self.stderr)
+
+
+def decode_output_lines(output: bytes) -> List[str]:
+    """
+    Decode raw process output into lines (without line endings).
+    """
+    return output.decode(errors='replace').splitlines()
+
+
+def get_process_group_kwargs() -> Dict[str, Any]:
+    """
+    Popen keyword arguments to launch the process in its own process group, so it can be killed along with its
+    children (with shell=True, the shell's child is the actual program).
+    """
+    match get_os():
+        case OS.WIN:
+            return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+        case _:
+            return {'start_new_session': True}
+
+
+def kill_process_group(pid: int):
+    """
+    Kill a process launched with get_process_group_kwargs, along with all of its children.
+    """
+    try:
+        match get_os():
+            case OS.WIN:
+                subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            case _:
+                os.killpg(pid, signal.SIGKILL)
+    except OSError:
+        pass  # Already terminated
+
+
+_EXECUTABLE_CACHE: Dict[str, Optional[str]] = {}
+
+
+def resolve_executable(executable: str, make_executable: bool = False) -> Optional[str]:
+    """
+    Returns the full path of an executable (looked up in PATH if it's only a name), else None. Results are cached, so
+    the lookup only happens once per executable.
+    :param make_executable: If the file is missing its execute permission, set it (chmod +x). Also only done once.
+    """
+    if executable not in _EXECUTABLE_CACHE:
+        if os.path.dirname(executable):
+            resolved = executable if os.path.isfile(executable) else None
+        else:
+            resolved = shutil.which(executable)
+        if resolved is not None and make_executable and not os.access(resolved, os.X_OK):
+            try:
+                os.chmod(resolved, os.stat(resolved).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+            except OSError as e:
+                debugUtils.log(debugUtils.Severity.WARNING, tool_name, f'Could not make "{resolved}" executable: {e}')
+        _EXECUTABLE_CACHE[executable] = resolved
+        debugUtils.log(debugUtils.Severity.DEBUG, tool_name, f'Resolved executable "{executable}": {resolved}')
+    return _EXECUTABLE_CACHE[executable]
+
+
+def clear_executable_cache(executable: Optional[str] = None):
+    """
+    Forget resolved executable(s), ex. when an executable's path changes. Clears all of them if None.
+    """
+    if executable is None:
+        _EXECUTABLE_CACHE.clear()
+    else:
+        _EXECUTABLE_CACHE.pop(executable, None)
+
+
+def _get_argv(command: List[str]) -> List[str]:
+    """
+    Argument list with its executable resolved (kept as is if it can't be resolved, so the launch error is explicit).
+    """
+    executable = resolve_executable(command[0])
+    return [executable if executable is not None else command[0]] + list(command[1:])
+
+
+def _launch_error_result(command: Union[str, List[str]], e: OSError, begin_time: float) -> CmdResult:
+    debugUtils.log(debugUtils.Severity.ERROR, tool_name, f'Could not launch command: {e}')
+    if isinstance(command, list):
+        error_msg = f'"{command[0]}" is not recognized as an executable: {e}'
+    else:
+        error_msg = str(e)
+    return CmdResult(command, None, b'', error_msg.encode(), time.monotonic() - begin_time)
+
+
+class _OutputCollector:
+    """
+    Output of a process, collected as it comes, with the time of its latest output (for inactivity time outs).
     """
 
-    def terminate_p_open(p_open_to_close):
+    def __init__(self, time_out: Optional[float], hard_time_out: Optional[float]):
+        self.stdout_chunk_lst: List[bytes] = []
+        self.stderr_chunk_lst: List[bytes] = []
+        self.time_out = time_out
+        self.hard_time_out = hard_time_out
+        self.begin_time = time.monotonic()
+        self.last_output_time = self.begin_time
+
+    def add(self, chunk_lst: List[bytes], chunk: bytes):
+        chunk_lst.append(chunk)
+        self.last_output_time = time.monotonic()
+
+    def get_wait_time(self) -> Optional[float]:
         """
-        Close Popen subprocess
-        :param p_open_to_close: Popen to close
-        :type p_open_to_close: subprocess.Popen
+        Seconds left before timing out (<= 0 if timed out), None if there is no time out.
         """
+        deadline_lst = []
+        if self.time_out is not None:
+            deadline_lst.append(self.last_output_time + self.time_out)
+        if self.hard_time_out is not None:
+            deadline_lst.append(self.begin_time + self.hard_time_out)
+        if len(deadline_lst) == 0:
+            return None
+        return min(deadline_lst) - time.monotonic()
+
+    def get_result(self, command: Union[str, List[str]], exit_code: Optional[int], timed_out: bool = False) -> CmdResult:
+        if timed_out:
+            debugUtils.log(debugUtils.Severity.WARNING, tool_name,
+                           f'Command timed out after {time.monotonic() - self.begin_time:.1f}s: {command}')
+        return CmdResult(command, exit_code, b''.join(self.stdout_chunk_lst), b''.join(self.stderr_chunk_lst),
+                         time.monotonic() - self.begin_time, timed_out=timed_out)
+
+
+def exec_cmd_result(command: Union[str, List[str]],
+                    time_out: Optional[float] = 15,
+                    input_data: Optional[bytes] = None,
+                    hard_time_out: Optional[float] = None) -> CmdResult:
+    """
+    Execute command and wait for it to complete.
+    Both pipes are drained at once (no polling, no deadlock when stderr fills up while stdout is being read).
+    :param command: Command to execute. A string goes through CMD shell (Windows) or the terminal (macOS & Linux). An
+                    argument list (ex. ["p4", "info"]) execs the binary directly: no extra shell process, and no
+                    quoting needed for arguments with spaces.
+    :param time_out: Seconds without any output after which the process and its children are killed (long commands
+                     are fine as long as they keep outputting). None waits forever.
+    :param input_data: Sent to the process' stdin (stdin is inherited when None)
+    :param hard_time_out: Opt-in wall-clock limit (seconds), after which the process is killed even if it outputs
+    :return: Result, with the output captured so far if it timed out
+    """
+    debugUtils.log(debugUtils.Severity.DEBUG, tool_name, f'Executing command: {command}')
+    collector = _OutputCollector(time_out, hard_time_out)
+    use_shell = isinstance(command, str)
+    try:
+        p_open = subprocess.Popen(command if use_shell else _get_argv(command),
+                                  shell=use_shell,
+                                  stdin=None if input_data is None else subprocess.PIPE,
+                                  stdout=subprocess.PIPE,
+                                  stderr=subprocess.PIPE,
+                                  **get_process_group_kwargs())
+    except OSError as e:
+        return _launch_error_result(command, e, collector.begin_time)
+
+    def drain(pipe: IO[bytes], chunk_lst: List[bytes]):
+        with pipe:
+            for chunk in iter(lambda: pipe.read1(65536), b''):
+                collector.add(chunk_lst, chunk)
+
+    def feed():
         try:
-            if p_open_to_close.stderr:
-                p_open_to_close.stderr.close()
-        except Exception:
-            pass
+            with p_open.stdin:
+                p_open.stdin.write(input_data)
+        except OSError:
+            pass  # Process exited without reading all of its input
+
+    thread_lst = [threading.Thread(target=drain, args=(p_open.stdout, collector.stdout_chunk_lst), daemon=True),
+                  threading.Thread(target=drain, args=(p_open.stderr, collector.stderr_chunk_lst), daemon=True)]
+    if input_data is not None:
+        thread_lst.append(threading.Thread(target=feed, daemon=True))
+    for thread in thread_lst:
+        thread.start()
+
+    # Sleep until the process exits or the next deadline (pushed back each time there is output)
+    timed_out = False
+    while True:
+        wait_time = collector.get_wait_time()
+        if wait_time is not None and wait_time <= 0:
+            timed_out = True
+            kill_process_group(p_open.pid)
+            break
         try:
-            if p_open_to_close.stdout:
-                p_open_to_close.stdout.close()
-        except Exception:
+            p_open.wait(timeout=wait_time)
+            break
+        except subprocess.TimeoutExpired:
             pass
+
+    p_open.wait()
+    for thread in thread_lst:
+        thread.join()
+    return collector.get_result(command, None if timed_out else p_open.returncode, timed_out)
+
+
+async def exec_cmd_async(command: Union[str, List[str]],
+                         time_out: Optional[float] = 15,
+                         input_data: Optional[bytes] = None,
+                         hard_time_out: Optional[float] = None) -> CmdResult:
+    """
+    Asynchronous variant of exec_cmd_result, so several commands can run concurrently (see exec_cmd_concurrently).
+    """
+    debugUtils.log(debugUtils.Severity.DEBUG, tool_name, f'Executing command (async): {command}')
+    collector = _OutputCollector(time_out, hard_time_out)
+    process_kwargs = dict(stdin=None if input_data is None else subprocess.PIPE,
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE,
+                          **get_process_group_kwargs())
+    try:
+        if isinstance(command, str):
+            process = await asyncio.create_subprocess_shell(command, **process_kwargs)
+        else:
+            process = await asyncio.create_subprocess_exec(*_get_argv(command), **process_kwargs)
+    except OSError as e:
+        return _launch_error_result(command, e, collector.begin_time)
+
+    async def drain(stream: asyncio.StreamReader, chunk_lst: List[bytes]):
+        while chunk := await stream.read(65536):
+            collector.add(chunk_lst, chunk)
+
+    async def feed():
+        try:
+            process.stdin.write(input_data)
+            await process.stdin.drain()
+            process.stdin.close()
+        except (OSError, ConnectionResetError):
+            pass  # Process exited without reading all of its input
+
+    task_lst = [asyncio.ensure_future(drain(process.stdout, collector.stdout_chunk_lst)),
+                asyncio.ensure_future(drain(process.stderr, collector.stderr_chunk_lst))]
+    if input_data is not None:
+        task_lst.append(asyncio.ensure_future(feed()))
+
+    # Sleep until the process exits or the next deadline (pushed back each time there is output)
+    timed_out = False
+    while True:
+        wait_time = collector.get_wait_time()
+        if wait_time is not None and wait_time <= 0:
+            timed_out = True
+            kill_process_group(process.pid)
+            break
         try:
-            if p_open_to_close.stdin is not None:
-                p_open_to_close.stdin.close()
-        except Exception:
+            await asyncio.wait_for(asyncio.shield(process.wait()), timeout=wait_time)
+            break
+        except asyncio.TimeoutError:
             pass
 
+    await process.wait()
+    await asyncio.gather(*task_lst)
+    return collector.get_result(command, None if timed_out else process.returncode, timed_out)
+
+
+def exec_cmd_concurrently(command_lst: List[Union[str, List[str]]],
+                          time_out: Optional[float] = 15,
+                          hard_time_out: Optional[float] = None) -> List[CmdResult]:
+    """
+    Execute several commands at once and wait for all of them.
+    :return: Results, in the same order as command_lst
+    """
+    async def exec_all():
+        return await asyncio.gather(*(exec_cmd_async(command, time_out, hard_time_out=hard_time_out)
+                                      for command in command_lst))
+    return list(asyncio.run(exec_all()))
+
+
+@contextlib.contextmanager
+def open_cmd_stream(command: List[str]) -> Iterator[IO[bytes]]:
+    """
+    Execute command (argument list) and give its stdout as a stream, to be read while the command runs. For outputs
+    too large to be kept in memory. Stderr is logged once done. If the stream isn't read to the end, the process
+    (and its children) are killed on exit.
+    Usage: with open_cmd_stream(["p4", "-G", "fstat", "//..."]) as stdout: ...
+    """
+    debugUtils.log(debugUtils.Severity.DEBUG, tool_name, f'Executing command (stream): {command}')
+    with tempfile.TemporaryFile() as stderr_file:  # A file, so stderr filling up can't block the process
+        try:
+            p_open = subprocess.Popen(_get_argv(command),
+                                      stdout=subprocess.PIPE,
+                                      stderr=stderr_file,
+                                      **get_process_group_kwargs())
+        except OSError as e:
+            _launch_error_result(command, e, time.monotonic())
+            yield io.BytesIO(b'')
+            return
+
+        try:
+            yield p_open.stdout
+        finally:
+            if p_open.poll() is None:
+                kill_process_group(p_open.pid)
+            p_open.stdout.close()
+            p_open.wait()
+            stderr_file.seek(0)
+            for line in decode_output_lines(stderr_file.read()):
+                debugUtils.log(debugUtils.Severity.WARNING, tool_name, line)
+
+
+def exec_cmd(command: Union[str, List[str]],
+             wait_for_output: bool = True,
+             in_new_window: bool = False,
+             time_out: Optional[float] = 15,
+             hard_time_out: Optional[float] = None):
+    """
+    Execute command from CMD shell (Windows) or the terminal (macOS & Linux)
+
+    Notes:
+    - If in_new_window=True, command is launched in a new terminal window and THIS FUNCTION RETURNS IMMEDIATELY.
+      (No output capture in the parent process.)
+    - A string command uses shell=True. An argument list execs the binary directly (see exec_cmd_result). In a new
+      window, it is joined back into a (quoted) string for the terminal.
+    - time_out is the time allowed without any output, hard_time_out an opt-in wall-clock limit (see exec_cmd_result).
+    """
+
     def clean_output_line(line_str: bytes) -> str:
         """
         Clean output lines so they only keep relevant information.
@@ -180,6 +485,9 @@ def exec_cmd(command: str,
 
     # If code must be executed in new terminal window
     if in_new_window:
+        if not isinstance(command, str):
+            command = shlex.join(command)
+
         # You said: if launching in new window, you never need to wait for output.
         # Force no-wait behavior and return immediately after launch.
         wait_for_output = False
@@ -236,52 +544,15 @@ def exec_cmd(command: str,
 
     # --- Normal (same-window) execution path ---
 
-    # Should use shell?
-    # use_shell = should_use_shell(command)
-    use_shell = True  # per your request for now
-
-    # Open subprocess
-    p_open = subprocess.Popen(
-        command,
-        shell=use_shell,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        stdin=None
-    )
-
-    output_lines: list[bytes] = []
-    loop_begin_time = time.time()
-    stdout_lst: list[bytes] = []
-    stderr_lst: list[bytes] = []
-
-    if wait_for_output:
-        while True:
-            status = p_open.poll()
-            if p_open.stdout:
-                try:
-                    p_open.stdout.flush()
-                except Exception:
-                    pass
-
-            stdout = p_open.stdout.readlines() if p_open.stdout else []
-            stderr = p_open.stderr.readlines() if p_open.stderr else []
-
-            if stdout:
-                stdout_lst += stdout
-            if stderr:
-                stderr_lst += stderr
-
-            if stdout or stderr:
-                loop_begin_time = time.time()
-
-            if status is not None:
-                output_lines = stdout_lst + stderr_lst
-                terminate_p_open(p_open)
-                break
-
-            if (time.time() - loop_begin_time) > time_out:
-                terminate_p_open(p_open)
-                break
+    # Don't wait: launch and return immediately
+    if not wait_for_output:
+        use_shell = isinstance(command, str)
+        subprocess.Popen(command if use_shell else _get_argv(command),
+                         shell=use_shell, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, stdin=None)
+        return []
+
+    cmd_result = exec_cmd_result(command, time_out=time_out, hard_time_out=hard_time_out)
+    output_lines: list[bytes] = cmd_result.stdout.splitlines() + cmd_result.stderr.splitlines()
 
     # Clean the output lines
     output_lines_cleaned: list[str] = []
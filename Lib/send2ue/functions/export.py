@@ -3,6 +3,7 @@
 import os
 import re
 import bpy
+import shutil
 import tempfile
 from . import unreal
 from . import utilities
@@ -470,12 +471,13 @@ def restore_rig_objects(context, properties):
             bpy.ops.ue2rigify.constrain_source_to_deform()
 
 
-def export_fbx_files(file_paths, properties):
+def set_export_context(properties):
     """
-    This function calls the blender fbx export operator with specific settings.
+    This function prepares the selected objects for export. It centers them, scales the rig objects and combines
+    the child meshes according to the selected properties.
 
-    :param dict file_paths: A dictionary of full file paths to be exported to FBX files.
     :param object properties: The property group that contains variables that maintain the addon's correct state.
+    :return dict: The original context of the scene and the names of the objects prepared for export.
     """
     # gets the original position and sets the objects position according to the selected properties.
     original_positions = set_selected_objects_to_center(properties)
@@ -486,15 +488,90 @@ def export_fbx_files(file_paths, properties):
     # combine all child meshes if option is on
     selected_object_names, duplicate_object_names = utilities.combine_child_meshes(properties)
 
-    for file_path in file_paths.values():
+    return {
+        'original_positions': original_positions,
+        'rig_context': context,
+        'selected_object_names': selected_object_names,
+        'duplicate_object_names': duplicate_object_names,
+        'export_object_names': [selected_object.name for selected_object in bpy.context.selected_objects]
+    }
+
+
+def restore_export_context(export_context, properties):
+    """
+    This function restores the scene to its state before the objects were prepared for export.
+
+    :param dict export_context: The export context returned by set_export_context.
+    :param object properties: The property group that contains variables that maintain the addon's correct state.
+    """
+    # remove duplicate objects
+    utilities.remove_objects(export_context['duplicate_object_names'])
+
+    # restore selection
+    utilities.set_selected_objects(export_context['selected_object_names'])
+
+    # restores original positions
+    set_object_positions(export_context['original_positions'])
+
+    # restores the original rig objects
+    restore_rig_objects(export_context['rig_context'], properties)
+
+
+def get_export_rig_object(rig_object, export_context):
+    """
+    This function gets the rig object that is exported in the given export context. This is the scaled duplicate of
+    the rig object if its bones were automatically scaled, otherwise the rig object itself.
+
+    :param object rig_object: A object of type armature.
+    :param dict export_context: The export context returned by set_export_context.
+    :return object: A object of type armature.
+    """
+    for duplicate_object in export_context['rig_context'].get('duplicate_objects', []):
+        if duplicate_object.type == 'ARMATURE':
+            return duplicate_object
+    return rig_object
+
+
+def sync_action_mute_values(rig_object, export_rig_object):
+    """
+    This function sets the mute values of the nla tracks on the export rig object to match the ones on the rig object.
+
+    :param object rig_object: A object of type armature with animation data.
+    :param object export_rig_object: The rig object prepared for export (see get_export_rig_object).
+    """
+    if export_rig_object != rig_object and rig_object.animation_data and export_rig_object.animation_data:
+        nla_tracks = zip(rig_object.animation_data.nla_tracks, export_rig_object.animation_data.nla_tracks)
+        for nla_track, export_nla_track in nla_tracks:
+            export_nla_track.mute = nla_track.mute
+
+
+def export_fbx_files(file_paths, properties, export_context=None):
+    """
+    This function calls the blender fbx export operator with specific settings.
+
+    :param dict file_paths: A dictionary of full file paths to be exported to FBX files.
+    :param object properties: The property group that contains variables that maintain the addon's correct state.
+    :param dict export_context: An export context shared by several exports (see set_export_context). If not
+    provided, the selected objects are prepared for this export only.
+    """
+    shared_export_context = export_context is not None
+    if shared_export_context:
+        # select the objects that were prepared for export
+        utilities.set_selected_objects(export_context['export_object_names'])
+    else:
+        export_context = set_export_context(properties)
+
+    fbx_file_paths = list(file_paths.values())
+    for file_path in fbx_file_paths:
         # if the folder does not exists create it
         folder_path = os.path.abspath(os.path.join(file_path, os.pardir))
         if not os.path.exists(folder_path):
             os.makedirs(folder_path)
 
+    if fbx_file_paths:
         # export the fbx file
         bpy.ops.export_scene.fbx(
-            filepath=file_path,
+            filepath=fbx_file_paths[0],
             use_selection=True,
             bake_anim_use_nla_strips=True,
             bake_anim_use_all_actions=False,
@@ -524,17 +601,13 @@ def export_fbx_files(file_paths, properties):
             use_metadata=properties.use_metadata
         )
 
-    # remove duplicate objects
-    utilities.remove_objects(duplicate_object_names)
-
-    # restore selection
-    utilities.set_selected_objects(selected_object_names)
-
-    # restores original positions
-    set_object_positions(original_positions)
+        # the other paths get a copy of the exported file, instead of serializing the same data again
+        for file_path in fbx_file_paths[1:]:
+            shutil.copyfile(fbx_file_paths[0], file_path)
 
-    # restores the original rig objects
-    restore_rig_objects(context, properties)
+    # the shared export context is restored once all its exports are done
+    if not shared_export_context:
+        restore_export_context(export_context, properties)
 
 
 def is_collision_of(asset_name, mesh_object_name):
@@ -653,18 +726,24 @@ def export_mesh(mesh_object, properties):
     return fbx_file_paths
 
 
-def export_action(rig_object, action_name, properties):
+def export_action(rig_object, action_name, properties, export_context=None):
     """
     This function exports a single action from a rig object to an fbx file.
 
     :param object rig_object: A object of type armature with animation data.
     :param str action_name: The name of the action to export.
     :param object properties: The property group that contains variables that maintain the addon's correct state.
+    :param dict export_context: The export context shared by all the actions of the rig (see set_export_context).
     :return str: The fbx file path of the exported action
     """
     control_rig_object = None
-    if rig_object.animation_data:
-        rig_object.animation_data.action = None
+    export_rig_object = rig_object
+    if export_context:
+        export_rig_object = get_export_rig_object(rig_object, export_context)
+
+    for scene_object in {rig_object, export_rig_object}:
+        if scene_object.animation_data:
+            scene_object.animation_data.action = None
 
     # if using ue2rigify get the control rig and removes its active animation
     if properties.use_ue2rigify:
@@ -685,18 +764,22 @@ def export_action(rig_object, action_name, properties):
     if properties.export_all_actions:
         set_action_mute_value(rig_object, action_name, False)
         set_action_mute_value(control_rig_object, utilities.get_action_name(action_name, properties), False)
+        sync_action_mute_values(rig_object, export_rig_object)
 
     # export the action
-    export_fbx_files(fbx_file_paths, properties)
+    export_fbx_files(fbx_file_paths, properties, export_context)
 
     # mute the action
     if properties.export_all_actions:
         # ensure the rigs are in rest position before setting the mute values
         utilities.clear_pose(rig_object)
         utilities.clear_pose(control_rig_object)
+        if export_rig_object != rig_object:
+            utilities.clear_pose(export_rig_object)
 
         set_action_mute_value(rig_object, action_name, True)
         set_action_mute_value(control_rig_object, utilities.get_action_name(action_name, properties), True)
+        sync_action_mute_values(rig_object, export_rig_object)
 
     # deselect the exported object
     rig_object.select_set(False)
@@ -763,9 +846,18 @@ def create_action_data(rig_objects, properties):
                 all_actions=properties.export_all_actions
             )
 
+            # prepare the rig for export once for all its actions, rather than scaling it again for each action
+            export_context = None
+            if action_names:
+                if rig_object.animation_data:
+                    rig_object.animation_data.action = None
+                utilities.deselect_all_objects()
+                rig_object.select_set(True)
+                export_context = set_export_context(properties)
+
             # export the actions and create the action import data
             for action_name in action_names:
-                fbx_file_paths = export_action(rig_object, action_name, properties)
+                fbx_file_paths = export_action(rig_object, action_name, properties, export_context)
 
                 # save the import data
                 action_data.append({
@@ -775,6 +867,11 @@ def create_action_data(rig_objects, properties):
                     'animation': True
                 })
 
+            # restore the rig objects once all its actions are exported
+            if export_context:
+                restore_export_context(export_context, properties)
+                utilities.deselect_all_objects()
+
             # set the action mute values back to their original state
             if properties.use_ue2rigify:
                 set_action_mute_values(control_rig_object, unmuted_action_names)
@@ -944,10 +1041,7 @@ def send2ue(properties):
         if assets_data:
             # check path mode to see if exported assets should be imported to unreal
             if properties.path_mode in ['send_to_unreal', 'both']:
-                for assets_data in assets_data:
-                    result = unreal.import_asset(assets_data, properties)
-                    if not result:
-                        break
+                unreal.import_assets(assets_data, properties)
 
             # remove unpacked files
             utilities.remove_unpacked_files(unpacked_files)
@@ -1,11 +1,15 @@
 # Copyright Epic Games, Inc. All Rights Reserved.
 
+import json
 import time
 from . import utilities
 from ..dependencies import remote_execution
 
 unreal_response = ''
 
+# the prefix of the line printed by the engine with the result of each import (see import_assets)
+import_result_prefix = 'SEND2UE_IMPORT_RESULT:'
+
 
 def run_unreal_python_commands(remote_exec, commands, failed_connection_attempts=0):
     """
@@ -49,70 +53,127 @@ def import_asset(asset_data, properties):
     :param dict asset_data: A dictionary of import parameters.
     :param object properties: The property group that contains variables that maintain the addon's correct state.
     """
+    return import_assets([asset_data], properties)[0]
+
+
+def import_assets(assets_data, properties):
+    """
+    This function imports assets to unreal based on the asset data in the provided dictionaries. The editor is found
+    once and sent a single command that creates all the import tasks and imports them in one call.
+
+    :param list assets_data: A list of dictionaries of import parameters.
+    :param object properties: The property group that contains variables that maintain the addon's correct state.
+    :return list: Whether or not each asset was imported.
+    """
+    import_arguments = [(
+        asset_data.get('fbx_file_path'),
+        asset_data.get('game_path'),
+        bool(asset_data.get('skeletal_mesh')),
+        bool(asset_data.get('animation')),
+        bool(asset_data.get('import_mesh')),
+        bool(asset_data.get('lods')),
+        asset_data.get('skeleton_game_path')
+    ) for asset_data in assets_data]
+
     # start a connection to the engine that lets you send python strings
     remote_exec = remote_execution.RemoteExecution()
     remote_exec.start()
 
     # send over the python code as a string
+    global unreal_response
+    unreal_response = ''
     run_unreal_python_commands(
         remote_exec,
         '\n'.join([
-            f'import_task = unreal.AssetImportTask()',
-            f'import_task.filename = r"{asset_data.get("fbx_file_path")}"',
-            f'import_task.destination_path = r"{asset_data.get("game_path")}"',
-            f'import_task.automated = {not properties.advanced_ui_import}',
-            f'import_task.replace_existing = True',
-            f'options = unreal.FbxImportUI()',
-            f'options.auto_compute_lod_distances = False',
-            f'options.lod_number = 0',
-            f'options.import_as_skeletal = {bool(asset_data.get("skeletal_mesh"))}',
-            f'options.import_animations = {bool(asset_data.get("animation"))}',
-            f'options.import_materials = {properties.import_materials}',
-            f'options.import_textures = {properties.import_textures}',
-            f'options.import_mesh = {bool(asset_data.get("import_mesh"))}',
-            f'options.static_mesh_import_data.generate_lightmap_u_vs = False',
-            f'options.lod_distance0 = 1.0',
+            f'import json',
+            f'def create_import_task(file_path, game_path, skeletal_mesh, animation, import_mesh, lods, skeleton_path):',
+            f'\timport_task = unreal.AssetImportTask()',
+            f'\timport_task.filename = file_path',
+            f'\timport_task.destination_path = game_path',
+            f'\timport_task.automated = {not properties.advanced_ui_import}',
+            f'\timport_task.replace_existing = True',
+            f'\toptions = unreal.FbxImportUI()',
+            f'\toptions.auto_compute_lod_distances = False',
+            f'\toptions.lod_number = 0',
+            f'\toptions.import_as_skeletal = skeletal_mesh',
+            f'\toptions.import_animations = animation',
+            f'\toptions.import_materials = {properties.import_materials}',
+            f'\toptions.import_textures = {properties.import_textures}',
+            f'\toptions.import_mesh = import_mesh',
+            f'\toptions.static_mesh_import_data.generate_lightmap_u_vs = False',
+            f'\toptions.lod_distance0 = 1.0',
 
             # if this is a skeletal mesh import
-            f'if {bool(asset_data.get("skeletal_mesh"))}:',
-            f'\toptions.mesh_type_to_import = unreal.FBXImportType.FBXIT_SKELETAL_MESH',
-            f'\toptions.skeletal_mesh_import_data.import_mesh_lo_ds = {bool(asset_data.get("lods"))}',
+            f'\tif skeletal_mesh:',
+            f'\t\toptions.mesh_type_to_import = unreal.FBXImportType.FBXIT_SKELETAL_MESH',
+            f'\t\toptions.skeletal_mesh_import_data.import_mesh_lo_ds = lods',
 
             # if this is an static mesh import
-            f'if {not bool(asset_data.get("skeletal_mesh"))}:',
-            f'\toptions.mesh_type_to_import = unreal.FBXImportType.FBXIT_STATIC_MESH',
-            f'\toptions.static_mesh_import_data.import_mesh_lo_ds = {bool(asset_data.get("lods"))}',
+            f'\telse:',
+            f'\t\toptions.mesh_type_to_import = unreal.FBXImportType.FBXIT_STATIC_MESH',
+            f'\t\toptions.static_mesh_import_data.import_mesh_lo_ds = lods',
 
             # if this is an animation import
-            f'if {bool(asset_data.get("animation"))}:',
-            f'\tskeleton_asset = unreal.load_asset(r"{asset_data.get("skeleton_game_path")}")',
+            f'\tif animation:',
+            f'\t\tskeleton_asset = unreal.load_asset(skeleton_path)',
 
             # if a skeleton can be loaded from the provided path
-            f'\tif skeleton_asset:',
-            f'\t\toptions.set_editor_property("skeleton", skeleton_asset)',
-            f'\t\toptions.set_editor_property("original_import_type", unreal.FBXImportType.FBXIT_ANIMATION)',
-            f'\t\toptions.set_editor_property("mesh_type_to_import", unreal.FBXImportType.FBXIT_ANIMATION)',
-            f'\t\toptions.anim_sequence_import_data.set_editor_property("preserve_local_transform", True)',
-            f'\telse:',
-            f'\t\traise RuntimeError("Unreal could not find a skeleton here: {asset_data.get("skeleton_game_path")}")',
-
-            # assign the options object to the import task and import the asset
-            f'import_task.options = options',
-            f'unreal.AssetToolsHelpers.get_asset_tools().import_asset_tasks([import_task])',
+            f'\t\tif skeleton_asset:',
+            f'\t\t\toptions.set_editor_property("skeleton", skeleton_asset)',
+            f'\t\t\toptions.set_editor_property("original_import_type", unreal.FBXImportType.FBXIT_ANIMATION)',
+            f'\t\t\toptions.set_editor_property("mesh_type_to_import", unreal.FBXImportType.FBXIT_ANIMATION)',
+            f'\t\t\toptions.anim_sequence_import_data.set_editor_property("preserve_local_transform", True)',
+            f'\t\telse:',
+            f'\t\t\traise RuntimeError(f"Unreal could not find a skeleton here: {{skeleton_path}}")',
+
+            # assign the options object to the import task
+            f'\timport_task.options = options',
+            f'\treturn import_task',
+
+            # create the import tasks, an asset that fails doesn't prevent the others from being imported
+            f'import_tasks = []',
+            f'errors = []',
+            f'for import_arguments in {import_arguments!r}:',
+            f'\ttry:',
+            f'\t\timport_tasks.append(create_import_task(*import_arguments))',
+            f'\t\terrors.append(None)',
+            f'\texcept Exception as error:',
+            f'\t\timport_tasks.append(None)',
+            f'\t\terrors.append(str(error))',
+
+            # import all the assets at once
+            f'unreal.AssetToolsHelpers.get_asset_tools().import_asset_tasks([task for task in import_tasks if task])',
 
             # check for a that the game asset imported correctly if the import object name as is False
-            f'if {not properties.import_object_name_as_root}:',
-            f'\tgame_asset = unreal.load_asset(r"{asset_data.get("game_path")}")',
-            f'\tif not game_asset:',
-            f'\t\traise RuntimeError("Multiple roots are found in the bone hierarchy. Unreal will only support a single root bone.")',
+            f'for index, import_arguments in enumerate({import_arguments!r}):',
+            f'\tif import_tasks[index] and {not properties.import_object_name_as_root}:',
+            f'\t\tgame_asset = unreal.load_asset(import_arguments[1])',
+            f'\t\tif not game_asset:',
+            f'\t\t\terrors[index] = "Multiple roots are found in the bone hierarchy. Unreal will only support a single root bone."',
+
+            # print the result of each import, so it can be read from the command output
+            f'print("{import_result_prefix}" + json.dumps(errors))',
         ]))
 
     # if there is an error report it
-    if unreal_response:
-        if unreal_response['result'] != 'None':
-            utilities.report_error(unreal_response['result'])
-            return False
-    return True
+    if not unreal_response:
+        return [False] * len(assets_data)
+
+    if unreal_response['result'] != 'None':
+        utilities.report_error(unreal_response['result'])
+        return [False] * len(assets_data)
+
+    errors = [None] * len(assets_data)
+    for output in unreal_response.get('output', []):
+        if output['output'].startswith(import_result_prefix):
+            errors = json.loads(output['output'][len(import_result_prefix):])
+
+    for error in errors:
+        if error:
+            utilities.report_error(error)
+            break
+
+    return [not error for error in errors]
 
 
 def asset_exists(game_path):
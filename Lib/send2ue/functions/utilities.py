@@ -2,6 +2,7 @@
 
 import os
 import bpy
+import numpy
 import shutil
 import tempfile
 from mathutils import Vector, Quaternion
@@ -103,6 +104,28 @@ def get_current_context():
     return current_context
 
 
+def get_material_face_counts(mesh_object):
+    """
+    This function counts the faces assigned to each material of the provided mesh object.
+
+    :param object mesh_object: A object of type mesh.
+    :return dict: A dictionary of face counts, with the material slot names as keys.
+    """
+    polygons = mesh_object.data.polygons
+    material_slots = mesh_object.material_slots
+
+    # read all the polygon material indices at once, then count the faces of each index
+    material_indices = numpy.empty(len(polygons), dtype=numpy.int32)
+    polygons.foreach_get('material_index', material_indices)
+    face_counts = numpy.bincount(material_indices, minlength=len(material_slots))
+
+    material_face_counts = {}
+    for material_slot, face_count in zip(material_slots, face_counts.tolist()):
+        material_face_counts[material_slot.name] = material_face_counts.get(material_slot.name, 0) + face_count
+
+    return material_face_counts
+
+
 def get_pose(rig_object):
     """
     This function gets the transforms of the pose bones on the provided rig object.
@@ -808,8 +831,30 @@ def round_keyframes(actions):
     """
     for action in actions:
         for fcurve in action.fcurves:
-            for keyframe_point in fcurve.keyframe_points:
-                keyframe_point.co[0] = round(keyframe_point.co[0])
+            # read the (frame, value) pairs of all the keyframes at once and round the frames
+            keyframe_points = fcurve.keyframe_points
+            co_values = numpy.empty(len(keyframe_points) * 2, dtype=numpy.float32)
+            keyframe_points.foreach_get('co', co_values)
+            co_values[0::2] = numpy.round(co_values[0::2])
+            keyframe_points.foreach_set('co', co_values)
+
+        # foreach_set doesn't notify blender of the change like setting each keyframe does
+        action.update_tag()
+
+
+def scale_keyframe_values(keyframe_points, scale):
+    """
+    This function multiplies the values of the provided keyframe points and their handles by the given scale.
+
+    :param object keyframe_points: The keyframe points of a fcurve.
+    :param float scale: The value to scale the keyframe values by.
+    """
+    values = numpy.empty(len(keyframe_points) * 2, dtype=numpy.float32)
+    for attribute in ['co', 'handle_left', 'handle_right']:
+        # each attribute is read as (frame, value) pairs, only the values are scaled (in double precision, like python)
+        keyframe_points.foreach_get(attribute, values)
+        values[1::2] = values[1::2].astype(numpy.float64) * scale
+        keyframe_points.foreach_set(attribute, values)
 
 
 def scale_object(scene_object, scale_factor):
@@ -859,12 +904,11 @@ def scale_object_actions(unordered_objects, actions, scale_factor):
                     if fcurve.data_path == 'location':
                         continue
 
-                    # and iterate through the keyframe values
-                    for keyframe_point in fcurve.keyframe_points:
-                        # multiply the location keyframes by the scale per channel
-                        keyframe_point.co[1] = keyframe_point.co[1] * scale[fcurve.array_index]
-                        keyframe_point.handle_left[1] = keyframe_point.handle_left[1] * scale[fcurve.array_index]
-                        keyframe_point.handle_right[1] = keyframe_point.handle_right[1] * scale[fcurve.array_index]
+                    # multiply the location keyframes by the scale per channel
+                    scale_keyframe_values(fcurve.keyframe_points, scale[fcurve.array_index])
+
+                # foreach_set doesn't notify blender of the change like setting each keyframe does
+                action.update_tag()
 
             # apply the scale on the object
             bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
@@ -878,7 +922,7 @@ def import_unreal_4_asset(file_path):
     :param str file_path: The full file path the file on disk.
     """
     # maybe get all the actions in the .blend so we can discern them from the ones that are about to be imported...
-    existing_actions = [action for action in bpy.data.actions]
+    existing_actions = set(bpy.data.actions)
 
     # import the fbx file
     bpy.ops.import_scene.fbx(filepath=file_path)
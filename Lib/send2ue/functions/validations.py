@@ -247,20 +247,13 @@ def validate_geometry_materials(mesh_objects):
     :return bool: True if the objects passed the validation.
     """
     for mesh_object in mesh_objects:
-        material_slots = [material_slots.name for material_slots in mesh_object.material_slots]
-
         if len(mesh_object.material_slots) > 0:
-            # for each polygon check for its material index
-            for polygon in mesh_object.data.polygons:
-                material = mesh_object.material_slots[polygon.material_index].name
-
-                # remove used material names from the list of unused material names
-                if material in material_slots:
-                    material_slots.remove(material)
+            # count the faces using each material
+            material_face_counts = utilities.get_material_face_counts(mesh_object)
 
             # iterate over unused materials and report about them
-            if material_slots:
-                for material_slot in material_slots:
+            for material_slot, face_count in material_face_counts.items():
+                if face_count == 0:
                     utilities.report_error(f'Mesh "{mesh_object.name}" has a unused material "{material_slot}"')
                     return False
     return True
@@ -74,6 +74,11 @@ class BLUE_HOLE_MT_export(bpy.types.Menu):
         show_label('FINAL Folder', layout)
         layout.operator(impExpOp.ExportAllHierarchiesToUE.bl_idname, icon='EXPORT')
         layout.operator(impExpOp.ExportSelectHierarchiesToUE.bl_idname, icon='EXPORT')
+        layout.operator(impExpOp.ExportDirtyHierarchiesToUE.bl_idname, icon='EXPORT')
+        layout.operator(impExpOp.ExportAllHierarchiesToUE.bl_idname, icon='EXPORT',
+                        text='Export (*ALL* Asset Hierarchies, Full) to FINAL Folder for UNREAL').full_export = True
+        layout.operator(impExpOp.ExportSelectHierarchiesToUE.bl_idname, icon='EXPORT',
+                        text='Export (Selected Asset Hierarchies, Full) to FINAL Folder for UNREAL').full_export = True
         layout.operator(impExpOp.BatchExportSelectedToFinal.bl_idname, icon='EXPORT')
         layout.separator()
         show_label('RESOURCES Folder', layout)
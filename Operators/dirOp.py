@@ -88,7 +88,7 @@ class OpenP4WorkspaceRootFolder(bpy.types.Operator):
             return {'FINISHED'}
 
         # Open folder
-        fileUtils.open_dir_path(p4Wrapper.P4Info().client_root)
+        fileUtils.open_dir_path(p4Wrapper.get_p4_info().client_root)
         return {'FINISHED'}
 
 
@@ -36,6 +36,9 @@ class ExportAllHierarchiesToUE(bpy.types.Operator):
     bl_label = "Export (*ALL* Asset Hierarchies) to FINAL Folder for UNREAL"
     bl_description = 'Exports all hierarchies created with the "Add Asset Hierarchy" tool in FINAL Folder'
 
+    full_export: bpy.props.BoolProperty(name="Full Export", default=False,
+                                        description="Also export the hierarchies unchanged since their last export")
+
     def execute(self, context):
         msg = 'Do you really want to export *ALL* Asset Hierarchies? Press OK to confirm.'
         state = uiUtils.display_msg_box_ok_cancel('Unreal Export', msg)
@@ -44,7 +47,7 @@ class ExportAllHierarchiesToUE(bpy.types.Operator):
             export_settings = get_export_settings(ExportSettingsPreset.UNREAL)
             asset_hierarchies = exportHierarchy.AssetHierarchies(export_settings)
             asset_hierarchies.set_hierarchies_from_scene()
-            asset_hierarchies.export(send=False, skip_sc=False)
+            asset_hierarchies.export(send=False, skip_sc=False, full_export=self.full_export)
         return {'FINISHED'}
 
 
@@ -54,12 +57,31 @@ class ExportSelectHierarchiesToUE(bpy.types.Operator):
     bl_label = "Export (Selected Asset Hierarchies) to FINAL Folder for UNREAL"
     bl_description = 'Exports selected hierarchies created with the "Add Asset Hierarchy" tool in FINAL Folder'
 
+    full_export: bpy.props.BoolProperty(name="Full Export", default=False,
+                                        description="Also export the hierarchies unchanged since their last export")
+
     def execute(self, context):
         # Get Unreal Export Profile
         export_settings = get_export_settings(ExportSettingsPreset.UNREAL)
         asset_hierarchies = exportHierarchy.AssetHierarchies(export_settings)
         asset_hierarchies.set_hierarchies_from_selection()
-        asset_hierarchies.export(send=False, skip_sc=False)
+        asset_hierarchies.export(send=False, skip_sc=False, full_export=self.full_export)
+        return {'FINISHED'}
+
+
+class ExportDirtyHierarchiesToUE(bpy.types.Operator):
+
+    bl_idname = "wm.bh_export_dirty_hierarchies_ue"
+    bl_label = "Export (Modified Asset Hierarchies) to FINAL Folder for UNREAL"
+    bl_description = 'Exports hierarchies modified since they were last exported (or since the scene was opened) in ' \
+                     'FINAL Folder'
+
+    def execute(self, context):
+        # Get Unreal Export Profile
+        export_settings = get_export_settings(ExportSettingsPreset.UNREAL)
+        asset_hierarchies = exportHierarchy.AssetHierarchies(export_settings)
+        if asset_hierarchies.set_hierarchies_from_dirty():
+            asset_hierarchies.export(send=False, skip_sc=False)
         return {'FINISHED'}
 
 
@@ -375,6 +397,7 @@ classes = (ImportGuide_5_6_ScaleMan,
            ImportGuide_6_1_ScaleMan,
            ExportAllHierarchiesToUE,
            ExportSelectHierarchiesToUE,
+           ExportDirtyHierarchiesToUE,
            BatchExportSelectedToSpeedTree_FBX,
            BatchExportSelectedToSpeedtreeLR_FBX,
            BatchExportSelectedToSpeedtreeHR_FBX,
@@ -189,6 +189,15 @@ def get_blue_hole_user_env_files_path() -> Path:
     return Path(get_blue_hole_user_addon_path(), 'envFiles')
 
 
+def get_blue_hole_user_cache_path() -> Path:
+    """
+    Get the directory where Blue Hole keeps its caches (User resource path), created if missing
+    """
+    cache_path = Path(get_resource_path_user(), 'BlueHoleCache')
+    cache_path.mkdir(parents=True, exist_ok=True)
+    return cache_path
+
+
 def get_blue_hole_local_env_files_path() -> str:
     """
     Get the environments path in Blue Hole (Blender install dir)
@@ -12,8 +12,11 @@ __status__ = 'Production'
 
 # ----------------------------------------------------------------------------------------------------------------------
 
+import contextlib
+
 import bpy
-from . import sourceControlUtils, blenderFile
+from . import sourceControlUtils, blenderFile, objectUtils
+from .export import hierarchyTracker
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -21,6 +24,9 @@ from . import sourceControlUtils, blenderFile
 
 show_verbose = True
 
+# Saves that aren't the user's (ex. scene snapshots for background export workers), see suppress_save_handlers
+_save_handlers_suppressed = False
+
 
 # ----------------------------------------------------------------------------------------------------------------------
 # CODE
@@ -30,25 +36,63 @@ def load_pre_handler(scene):
     print("Event: load_pre")
 
 
+@contextlib.contextmanager
+def suppress_save_handlers():
+    """
+    Saves made within this context don't run the save handlers (no checkout of the opened .blend)
+    """
+    global _save_handlers_suppressed
+    _save_handlers_suppressed = True
+    try:
+        yield
+    finally:
+        _save_handlers_suppressed = False
+
+
 @bpy.app.handlers.persistent
 def load_post_handler(scene):
     print("Event: load_post")
+    if bpy.app.background:
+        return  # Background instances (ex. export workers) don't track the scene nor prompt for source control
+    objectUtils.get_scene_hierarchy_index().rebuild()
+    hierarchyTracker.get_hierarchy_tracker().reset()
     if len(blenderFile.get_blend_file_path()) > 0:
-        sourceControlUtils.sc_check_blend(silent_mode=False)  # Checks status with perforce and prompt to get latest, checkout, etc.
+        # Fetch status in the background, then prompt to get latest, checkout, etc. if needed
+        if not sourceControlUtils.sc_refresh_blend_status(check_on_result=True):
+            sourceControlUtils.sc_check_blend(silent_mode=False)
 
 
 @bpy.app.handlers.persistent
 def save_pre_handler(scene):
+    if _save_handlers_suppressed or bpy.app.background:
+        return
     if len(blenderFile.get_blend_file_path()) > 0:
-        sourceControlUtils.sc_check_blend(silent_mode=False)  # Checks status with perforce and prompt to get latest, checkout, etc.
+        sourceControlUtils.sc_check_blend_on_save()  # Only asks perforce if not known to be checked out already
     print("Event: save_pre")
 
 
 @bpy.app.handlers.persistent
 def save_post_handler(scene):
+    if _save_handlers_suppressed:
+        return
     print("Event: save_post")
 
 
+@bpy.app.handlers.persistent
+def depsgraph_update_post_handler(scene, depsgraph):
+    if bpy.app.background:
+        return
+    # Roots that lost objects are only known before the index is rebuilt, so the index goes first
+    changed_root_uid_set = objectUtils.get_scene_hierarchy_index().on_depsgraph_update(depsgraph)
+    hierarchyTracker.get_hierarchy_tracker().on_depsgraph_update(depsgraph, changed_root_uid_set)
+
+
+@bpy.app.handlers.persistent
+def undo_redo_post_handler(scene):
+    # Undo/Redo restores objects as they were, without depsgraph updates for the ones affected
+    objectUtils.get_scene_hierarchy_index().rebuild()
+
+
 class OBJECT_OT_dummy(bpy.types.Operator):
     """Tooltip"""
     bl_idname = "object.dummy"
@@ -80,6 +124,9 @@ def register():
     bpy.app.handlers.load_post.append(load_post_handler)
     bpy.app.handlers.save_pre.append(save_pre_handler)
     bpy.app.handlers.save_post.append(save_post_handler)
+    bpy.app.handlers.depsgraph_update_post.append(depsgraph_update_post_handler)
+    bpy.app.handlers.undo_post.append(undo_redo_post_handler)
+    bpy.app.handlers.redo_post.append(undo_redo_post_handler)
 
     # # supposedly not needed anymore and throws errors
     # bpy.app.handlers.depsgraph_update_post.append(call_load_handlers)
@@ -91,3 +138,7 @@ def unregister():
     bpy.app.handlers.load_post.remove(load_post_handler)
     bpy.app.handlers.save_pre.remove(save_pre_handler)
     bpy.app.handlers.save_post.remove(save_post_handler)
+    bpy.app.handlers.depsgraph_update_post.remove(depsgraph_update_post_handler)
+    bpy.app.handlers.undo_post.remove(undo_redo_post_handler)
+    bpy.app.handlers.redo_post.remove(undo_redo_post_handler)
+    sourceControlUtils.sc_stop_blend_status_refresh()
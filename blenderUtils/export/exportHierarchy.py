@@ -16,6 +16,10 @@ __status__ = 'Production'
 # IMPORTS
 
 # System
+import json
+import os
+import shutil
+import tempfile
 from typing import *
 
 # Blender
@@ -24,15 +28,25 @@ import bpy
 # Blue Hole
 from .. import sourceControlUtils as scUtils
 from .exportSettings import *
+from . import exportManifest, hierarchyTracker
 from ...Lib.commonUtils.debugUtils import *
-from .. import sceneUtils, objectUtils, filterUtils, sendUnreal
+from .. import sceneUtils, objectUtils, filterUtils, sendUnreal, callbacks
 from ...preferences.prefs import *
+from ...Lib.commonUtils.wrappers import cmdShellWrapper
 
 # ----------------------------------------------------------------------------------------------------------------------
 # DEBUG
 
 show_verbose = True
 
+# ----------------------------------------------------------------------------------------------------------------------
+# USER DEFINED VARIABLES
+
+parallel_export_worker_count = 0  # Background Blender processes exporting hierarchies in parallel (0 to disable)
+parallel_export_min_hierarchies = 8  # Fewer hierarchies are exported in this instance (not worth a worker's startup)
+parallel_export_time_out = 1800  # Seconds a worker is given to export its hierarchies
+incremental_export = True  # Skip hierarchies unchanged since their last export (full exports export them all)
+
 # ----------------------------------------------------------------------------------------------------------------------
 # CODE
 
@@ -95,15 +109,11 @@ class AssetHierarchy:
 
     def export(self, send: bool):
         """
+        Export this hierarchy on its own. To export several, use AssetHierarchies.export instead, which runs the checks
+        and scene setup once for the whole batch.
         """
         # Check tests
-        chk_result = filterUtils.check_tests(ah_tool_name,
-                                             check_blend_exist=True,
-                                             check_blend_loc_in_dir_structure=True,
-                                             check_source_content_root_path_exist=send,
-                                             check_blend_in_source_content=send,
-                                             check_unity_assets_path_exist=self.export_settings.engine == Engine.UNITY)
-        if not chk_result:
+        if not check_export_tests(self.export_settings, send):
             log(Severity.CRITICAL, ah_tool_name, 'Aborting Export')
 
         # Set to Object Mode
@@ -111,29 +121,18 @@ class AssetHierarchy:
         # Unselect everything
         sceneUtils.deselect_all()
 
-        # Rename Render, Collision, Socket objects
-        if self.render is not None:
-            # Have to do three times for this to work... IDK Why. But it works?
-            self.render.name = prefs().env.asset_hierarchy_empty_object_meshes
-            self.render.name = prefs().env.asset_hierarchy_empty_object_meshes
-            self.render.name = prefs().env.asset_hierarchy_empty_object_meshes
-        if self.collision is not None:
-            # Have to do three times for this to work... IDK Why. But it works?
-            self.collision.name = prefs().env.asset_hierarchy_empty_object_collisions
-            self.collision.name = prefs().env.asset_hierarchy_empty_object_collisions
-            self.collision.name = prefs().env.asset_hierarchy_empty_object_collisions
-        if self.socket is not None:
-            # Have to do three times for this to work... IDK Why. But it works?
-            self.socket.name = prefs().env.asset_hierarchy_empty_object_sockets
-            self.socket.name = prefs().env.asset_hierarchy_empty_object_sockets
-            self.socket.name = prefs().env.asset_hierarchy_empty_object_sockets
-
-        # Rename collisions
-        if self.export_settings.rename_collisions_for_ue:
-            self.rename_collisions()
+        result = self.export_obj_lst(send, self.get_obj_lst(), set())
+        sceneUtils.deselect_all()
+        return result
 
-        # Get list of objects
-        obj_lst = self.get_obj_lst()
+    def export_obj_lst(self, send: bool, obj_lst: List, selected_obj_set: Set) -> bool:
+        """
+        Export the hierarchy's objects, once the scene is in Object Mode. Selection is only changed where it differs
+        from the previous export (instead of deselecting the whole scene every time).
+        :param obj_lst: The hierarchy's objects (see get_obj_lst)
+        :param selected_obj_set: Objects currently selected. Updated to what is left selected after the export.
+        """
+        self.set_export_names()
 
         # Store visibility of objects
         obj_visib_lst = []
@@ -163,9 +162,16 @@ class AssetHierarchy:
             bpy.ops.transform.rotate(value=-1.57079632679, orient_axis='X', constraint_axis=(True, False, False))
             bpy.ops.object.transform_apply(rotation=True)
             bpy.ops.transform.rotate(value=1.57079632679, orient_axis='X', constraint_axis=(True, False, False))
+            selected_obj_set.clear()
+            selected_obj_set.add(self.root)
 
-        # Select Object
-        objectUtils.select_obj_lst(obj_lst)
+        # Select Object (only toggle what differs from the current selection)
+        obj_set = set(obj_lst)
+        for obj in selected_obj_set - obj_set:
+            obj.select_set(False)
+        objectUtils.select_obj_lst([obj for obj in obj_lst if obj not in selected_obj_set])
+        selected_obj_set.clear()
+        selected_obj_set.update(obj_set)
 
         # Some Exporters Only Use the Active Object
         view_layer = bpy.context.view_layer
@@ -188,13 +194,12 @@ class AssetHierarchy:
         for obj in obj_visib_lst:
             if not obj[1]:
                 obj[0].hide_set(True)
+                selected_obj_set.discard(obj[0])  # Hiding deselects
 
         # Set Object Position to Previous
         if self.export_settings.zero_root_transform:
             objectUtils.set_obj_world_translation(self.root, obj_world_translation)
 
-        sceneUtils.deselect_all()
-
         # SEND TO UNREAL (IF APPLICABLE)
         if send and self.export_settings.engine == Engine.UNREAL:
             result = sendUnreal.trigger_unreal_import(str(self.path))
@@ -202,6 +207,32 @@ class AssetHierarchy:
                 return False
         return True
 
+    def set_export_names(self):
+        """
+        Rename the objects as they are exported: components without trailing numbers, collisions for Unreal. Done in
+        this scene for in-process and background worker exports alike (see AssetHierarchies.export_parallel).
+        """
+        # Rename Render, Collision, Socket objects
+        if self.render is not None:
+            # Have to do three times for this to work... IDK Why. But it works?
+            self.render.name = prefs().env.asset_hierarchy_empty_object_meshes
+            self.render.name = prefs().env.asset_hierarchy_empty_object_meshes
+            self.render.name = prefs().env.asset_hierarchy_empty_object_meshes
+        if self.collision is not None:
+            # Have to do three times for this to work... IDK Why. But it works?
+            self.collision.name = prefs().env.asset_hierarchy_empty_object_collisions
+            self.collision.name = prefs().env.asset_hierarchy_empty_object_collisions
+            self.collision.name = prefs().env.asset_hierarchy_empty_object_collisions
+        if self.socket is not None:
+            # Have to do three times for this to work... IDK Why. But it works?
+            self.socket.name = prefs().env.asset_hierarchy_empty_object_sockets
+            self.socket.name = prefs().env.asset_hierarchy_empty_object_sockets
+            self.socket.name = prefs().env.asset_hierarchy_empty_object_sockets
+
+        # Rename collisions
+        if self.export_settings.rename_collisions_for_ue:
+            self.rename_collisions()
+
     def get_obj_lst(self):
 
         # Wipe existing object list
@@ -232,6 +263,15 @@ class AssetHierarchy:
 
         return obj_lst
 
+    def get_fingerprint(self) -> Optional[str]:
+        """ Content fingerprint of the hierarchy, to know if it changed since its last export (see exportManifest) """
+        # Objects renamed by set_export_names
+        renamed_obj_set = {component for component in [self.render, self.collision, self.socket]
+                           if component is not None}
+        if self.export_settings.rename_collisions_for_ue and self.collision is not None:
+            renamed_obj_set.update(objectUtils.get_obj_child_recursive(self.collision))
+        return exportManifest.get_fingerprint(self.path, self.export_settings, self.get_obj_lst(), renamed_obj_set)
+
     def rename_collisions(self):
         """ Rename meshes under the collision component, to match Unreal's collision naming. """
         if self.collision is None:
@@ -301,6 +341,16 @@ class AssetHierarchies:
         root_obj_lst = self.get_hierarchy_root_from_obj_lst(scene_obj_lst)
         self.__set_hierarchies_from_root_obj_lst(root_obj_lst)
 
+    def set_hierarchies_from_dirty(self) -> bool:
+        """ Set the hierarchies modified since they were last exported (see hierarchyTracker) """
+        dirty_root_obj_lst = hierarchyTracker.get_hierarchy_tracker().get_dirty_root_obj_lst()
+        root_obj_lst = self.get_hierarchy_root_from_obj_lst(dirty_root_obj_lst)
+        if len(root_obj_lst) == 0:
+            self.hierarchies = []
+            log(Severity.INFO, ah_tool_name, 'No Asset Hierarchy was modified since it was last exported')
+            return False
+        return self.__set_hierarchies_from_root_obj_lst(root_obj_lst)
+
     def __set_hierarchies_from_root_obj_lst(self, root_obj_lst) -> bool:
         """ Set the hierarchies from a list of root objects. """
 
@@ -323,38 +373,56 @@ class AssetHierarchies:
         """
         Returns a List of hierarchy roots from a selection
         """
-        # Get list of hierarchy prefixes
-        ah_prefix_lst: List[str] = [
+        # Get tuple of hierarchy prefixes
+        ah_prefix_tuple = (
             prefs().env.asset_hierarchy_struct_prefix_static_mesh,
             prefs().env.asset_hierarchy_struct_prefix_static_mesh_kit,
             prefs().env.asset_hierarchy_struct_prefix_skeletal_mesh
-        ]
+        )
 
-        # Export Root List
-        exp_root_lst = []
+        # Export Root List (dict used as an ordered set)
+        exp_root_dict = {}
+        checked_root_set = set()
 
         # Go through selection to get list of upmost parents. Only add to list if item is not already there
         for obj in obj_lst:
 
             upmost_parent_obj = objectUtils.get_obj_upmost_parent(obj)
+            if upmost_parent_obj in checked_root_set:
+                continue
+            checked_root_set.add(upmost_parent_obj)
 
             # Checking if valid root
             if 'EMPTY' in objectUtils.get_obj_type(upmost_parent_obj):  # If Empty, it's a transform
-                for ah_prefix in ah_prefix_lst:
-                    if objectUtils.get_obj_name(upmost_parent_obj)[:len(ah_prefix)] == ah_prefix:
-                        if upmost_parent_obj not in exp_root_lst:
-                            exp_root_lst.append(upmost_parent_obj)
+                if objectUtils.get_obj_name(upmost_parent_obj).startswith(ah_prefix_tuple):
+                    exp_root_dict[upmost_parent_obj] = None
+
+        return list(exp_root_dict)
+
+    def export(self, send: bool, skip_sc: bool = False, full_export: bool = False):
+        # Set to Object Mode (first, so Edit Mode changes are flushed to the meshes before they are fingerprinted)
+        sceneUtils.set_object_mode()
 
-        return exp_root_lst
+        # INCREMENTAL EXPORT (only export the hierarchies that changed since their last export). Sends and full exports
+        # don't skip any: the manifest only knows what was exported, not what was imported in the engine.
+        export_manifest = None
+        if incremental_export:
+            export_manifest = exportManifest.ExportManifest(self.export_settings.exp_dir)
+            if not send and not full_export:
+                self.hierarchies = self.get_changed_hierarchies(export_manifest)
+                if len(self.hierarchies) == 0:
+                    log(Severity.INFO, ah_tool_name, 'All Asset Hierarchies are up to date, nothing to export')
+                    return
 
-    def export(self, send: bool, skip_sc: bool = False):
         # SOURCE CONTROL
+        sc_export_batch = None
         if not skip_sc:
             sc_file_path_lst: List[Path] = []
             for hierarchy in self.hierarchies:
                 sc_file_path_lst.append(hierarchy.path)
             # Attempt to Open Files for Edit
-            if not scUtils.sc_open_edit_file_path_lst(sc_file_path_lst):
+            sc_export_batch = scUtils.ScExportBatch(sc_file_path_lst)
+            if not sc_export_batch.open_for_edit():
                 msg = 'There were errors checking out files'
                 if prefs().sc.source_control_error_aborts_exp:
                     msg += ' - Aborting!'
@@ -364,23 +432,147 @@ class AssetHierarchies:
                     msg += ' - Proceeding regardless!'
                     log(Severity.WARNING, ah_tool_name, msg)
 
+        # CHECK TESTS (once for the whole batch, hierarchies share the same export settings)
+        if not check_export_tests(self.export_settings, send):
+            log(Severity.CRITICAL, ah_tool_name, 'Aborting Export')
+
         # PREPARE SELECTION STATE FOR EXPORT
         msg = 'Preparing Selection State for Exports (Unselect All)'
         log(Severity.DEBUG, ah_tool_name, msg)
         view_layer = bpy.context.view_layer
         obj_active = view_layer.objects.active
-        # Set to Object Mode
-        sceneUtils.set_object_mode()
         # Unselect everything
         sceneUtils.deselect_all()
 
-        # EXPORT
-        for hierarchy in self.hierarchies:
-            hierarchy.export(send)
+        # EXPORT IN BACKGROUND WORKERS (IF ENABLED), the ones that failed are exported below
+        hierarchy_lst = self.hierarchies
+        if self.is_parallel_export_enabled():
+            hierarchy_lst = self.export_parallel()
+
+        # EXPORT (object lists computed up front, selection carried from one export to the next)
+        obj_lst_lst = [hierarchy.get_obj_lst() for hierarchy in hierarchy_lst]
+        selected_obj_set = set()
+        exported_name_set = {hierarchy.name for hierarchy in self.hierarchies if hierarchy not in hierarchy_lst}
+        for hierarchy, obj_lst in zip(hierarchy_lst, obj_lst_lst):
+            if hierarchy.export_obj_lst(False, obj_lst, selected_obj_set):
+                exported_name_set.add(hierarchy.name)
+        sceneUtils.deselect_all()
+
+        # SEND TO UNREAL (IF APPLICABLE), all exported hierarchies in a single import
+        send_hierarchy_lst = [hierarchy for hierarchy in self.hierarchies if hierarchy.name in exported_name_set]
+        failed_import_name_lst = []
+        if send and self.export_settings.engine == Engine.UNREAL and len(send_hierarchy_lst) > 0:
+            result_lst = sendUnreal.trigger_unreal_import_lst([str(hierarchy.path) for hierarchy in send_hierarchy_lst])
+            for hierarchy, result in zip(send_hierarchy_lst, result_lst):
+                if not result:
+                    exported_name_set.discard(hierarchy.name)
+                    failed_import_name_lst.append(hierarchy.name)
+        exported_root_lst = [hierarchy.root for hierarchy in self.hierarchies if hierarchy.name in exported_name_set]
+        hierarchyTracker.get_hierarchy_tracker().set_clean(exported_root_lst)
+
+        # RECORD WHAT WAS EXPORTED (fingerprints taken after the exports, which may have renamed objects). Failures
+        # aren't recorded, so they are exported again next time.
+        if export_manifest is not None:
+            for hierarchy in self.hierarchies:
+                if hierarchy.name in exported_name_set:
+                    fingerprint = hierarchy.get_fingerprint()
+                    if fingerprint is not None:
+                        export_manifest.set_exported(hierarchy.path, fingerprint)
+            export_manifest.save()
+
+        # SOURCE CONTROL (shelve or submit what was exported, if configured)
+        if sc_export_batch is not None:
+            sc_export_batch.complete()
 
         # SET PREVIOUS SELECTION STATE
         view_layer.objects.active = obj_active
 
+        # REPORT IMPORT FAILURES (once everything else is done for the ones that succeeded)
+        if len(failed_import_name_lst) > 0:
+            msg = (f'{len(failed_import_name_lst)} Asset Hierarchies could not be imported in Unreal: '
+                   f'{", ".join(failed_import_name_lst)}')
+            log(Severity.ERROR, ah_tool_name, msg, popup=True)
+
+    def get_changed_hierarchies(self, export_manifest: exportManifest.ExportManifest) -> List[AssetHierarchy]:
+        changed_hierarchy_lst = []
+        for hierarchy in self.hierarchies:
+            fingerprint = hierarchy.get_fingerprint()
+            if fingerprint is not None and export_manifest.is_up_to_date(hierarchy.path, fingerprint):
+                log(Severity.DEBUG, ah_tool_name, f'Skipping "{hierarchy.name}" (unchanged since last export)')
+            else:
+                changed_hierarchy_lst.append(hierarchy)
+        return changed_hierarchy_lst
+
+    def is_parallel_export_enabled(self) -> bool:
+        # Unity exports rotate the root with transform operators, which need the UI, so they stay in this instance
+        return (parallel_export_worker_count > 0
+                and len(self.hierarchies) >= parallel_export_min_hierarchies
+                and self.export_settings.engine != Engine.UNITY)
+
+    def export_parallel(self) -> List[AssetHierarchy]:
+        """
+        Export the hierarchies in background Blender processes: the scene is saved to a temporary .blend, which each
+        worker opens to export its own subset of hierarchies (see exportWorker.py). This Blender's scene is untouched.
+        :return: Hierarchies that could not be exported by the workers (to export in this instance instead)
+        """
+        success_name_set = set()
+        temp_dir_path = tempfile.mkdtemp(prefix='bh_export_')
+        try:
+            # Same renames as in-process exports, in the same order, so this scene ends up in the same state (and is
+            # fingerprinted with the exported names)
+            for hierarchy in self.hierarchies:
+                hierarchy.set_export_names()
+
+            # Snapshot of the scene, as it is now (incl. unsaved changes). Not a save of the opened .blend, so it
+            # must not go through the save handlers (checkout of the .blend)
+            snapshot_path = os.path.join(temp_dir_path, 'snapshot.blend')
+            with callbacks.suppress_save_handlers():
+                bpy.ops.wm.save_as_mainfile(filepath=snapshot_path, copy=True)
+
+            # Split hierarchies in disjoint subsets, one per worker
+            worker_count = min(parallel_export_worker_count, len(self.hierarchies))
+            package = __package__.rsplit('.blenderUtils', 1)[0]
+            worker_script_path = os.path.join(os.path.dirname(__file__), 'exportWorker.py')
+            command_lst = []
+            result_file_path_lst = []
+            for worker_index in range(worker_count):
+                job_file_path = os.path.join(temp_dir_path, f'job_{worker_index}.json')
+                result_file_path = os.path.join(temp_dir_path, f'result_{worker_index}.json')
+                job = {'package': package,
+                       'export_settings': self.export_settings.to_json_dict(),
+                       'root_name_lst': [hierarchy.name for hierarchy in self.hierarchies[worker_index::worker_count]],
+                       'result_file_path': result_file_path}
+                with open(job_file_path, 'w', encoding='utf-8') as job_file:
+                    json.dump(job, job_file)
+                command_lst.append([bpy.app.binary_path, '-b', snapshot_path,
+                                    '--python', worker_script_path, '--', job_file_path])
+                result_file_path_lst.append(result_file_path)
+
+            log(Severity.INFO, ah_tool_name, f'Exporting {len(self.hierarchies)} hierarchies in {worker_count} workers')
+            cmd_result_lst = cmdShellWrapper.exec_cmd_concurrently(command_lst, time_out=None,
+                                                                   hard_time_out=parallel_export_time_out)
+
+            # Gather results
+            for cmd_result, result_file_path in zip(cmd_result_lst, result_file_path_lst):
+                if cmd_result.timed_out or not os.path.isfile(result_file_path):
+                    log(Severity.ERROR, ah_tool_name, f'Export worker failed: {cmd_result.get_stderr_lines()[-20:]}')
+                    continue
+                with open(result_file_path, encoding='utf-8') as result_file:
+                    for result in json.load(result_file):
+                        if result['success']:
+                            success_name_set.add(result['name'])
+                        else:
+                            msg = f'Export worker failed on "{result["name"]}": {result["error"]}'
+                            log(Severity.ERROR, ah_tool_name, msg)
+        finally:
+            shutil.rmtree(temp_dir_path, ignore_errors=True)
+
+        failed_lst = [hierarchy for hierarchy in self.hierarchies if hierarchy.name not in success_name_set]
+        if len(failed_lst) > 0:
+            msg = f'{len(failed_lst)} hierarchies will be exported in this instance instead'
+            log(Severity.WARNING, ah_tool_name, msg)
+        return failed_lst
+
     def critical_no_hierarchy(self):
         # Define the prefix variables first
         static_mesh_prefix = prefs().env.asset_hierarchy_struct_prefix_static_mesh
@@ -397,6 +589,18 @@ class AssetHierarchies:
         log(Severity.CRITICAL, ah_tool_name, msg, popup=True)
 
 
+def check_export_tests(export_settings: ExportSettings, send: bool) -> bool:
+    """
+    Checks required before exporting asset hierarchies (same for every hierarchy of a batch)
+    """
+    return filterUtils.check_tests(ah_tool_name,
+                                   check_blend_exist=True,
+                                   check_blend_loc_in_dir_structure=True,
+                                   check_source_content_root_path_exist=send,
+                                   check_blend_in_source_content=send,
+                                   check_unity_assets_path_exist=export_settings.engine == Engine.UNITY)
+
+
 def get_hierarchy_prefix_lst():
     """
     Returns list of hierarchy prefix
@@ -149,12 +149,14 @@ class ExportMeshes:
 
     def export(self, skip_sc: bool = False):
         # SOURCE CONTROL
+        sc_export_batch = None
         if not skip_sc:
             sc_file_path_lst: List[Path] = []
             for exp_mesh in self.exp_mesh_lst:
                 sc_file_path_lst.append(exp_mesh.path)
             # Attempt to Open Files for Edit
-            if not scUtils.sc_open_edit_file_path_lst(sc_file_path_lst):
+            sc_export_batch = scUtils.ScExportBatch(sc_file_path_lst)
+            if not sc_export_batch.open_for_edit():
                 msg = 'There were errors checking out files'
                 if prefs().sc.source_control_error_aborts_exp:
                     msg += ' - Aborting!'
@@ -178,6 +180,10 @@ class ExportMeshes:
         for exp_mesh in self.exp_mesh_lst:
             exp_mesh.export()
 
+        # SOURCE CONTROL (shelve or submit what was exported, if configured)
+        if sc_export_batch is not None:
+            sc_export_batch.complete()
+
         # SET PREVIOUS SELECTION STATE
         view_layer.objects.active = obj_active
 
@@ -0,0 +1,278 @@
+"""
+Incremental Asset Hierarchy Exports: a content fingerprint per hierarchy, stored in a manifest next to the exports, so
+hierarchies that did not change since their last export can be skipped (export & source control).
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# AUTHORSHIP INFORMATION - THIS FILE BELONGS TO THE BLUE HOLE BLENDER PLUGIN https://blue-hole.weebly.com
+
+__author__ = 'Marc-André Voyer'
+__copyright__ = 'Copyright (C) 2020-2026, Marc-André Voyer'
+__license__ = "MIT License"
+__maintainer__ = 'Marc-André Voyer'
+__email__ = 'marcandre.voyer@gmail.com'
+__status__ = 'Production'
+
+# ----------------------------------------------------------------------------------------------------------------------
+# IMPORTS
+
+# System
+import array
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import *
+
+# Blue Hole
+from ...Lib.commonUtils.debugUtils import *
+from .exportSettings import *
+
+# ----------------------------------------------------------------------------------------------------------------------
+# CODE
+
+manifest_tool_name = 'Asset Hierarchy Export Manifest'
+manifest_file_name = '.bh_export_manifest.json'
+
+# Property types of modifiers that are part of the fingerprint
+_MODIFIER_PROPERTY_TYPE_LST = ['BOOLEAN', 'INT', 'FLOAT', 'STRING', 'ENUM', 'POINTER']
+
+# Mesh attribute data types: (foreach_get attribute, array type code, values per item). Booleans are read separately.
+_ATTRIBUTE_FOREACH_DICT = {'FLOAT': ('value', 'f', 1),
+                           'INT': ('value', 'i', 1),
+                           'INT8': ('value', 'i', 1),
+                           'FLOAT2': ('vector', 'f', 2),
+                           'INT32_2D': ('value', 'i', 2),
+                           'FLOAT_VECTOR': ('vector', 'f', 3),
+                           'FLOAT_COLOR': ('color', 'f', 4),
+                           'BYTE_COLOR': ('color', 'f', 4),
+                           'QUATERNION': ('value', 'f', 4),
+                           'FLOAT4X4': ('value', 'f', 16)}
+
+
+class ExportManifest:
+    """
+    Fingerprints of the last export of each file of an export directory, stored in a sidecar file in that directory.
+    """
+
+    def __init__(self, exp_dir: Union[str, Path]):
+        self.path: Path = Path(exp_dir, manifest_file_name)
+        self.__entry_dict: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, encoding='utf-8') as manifest_file:
+                self.__entry_dict = json.load(manifest_file)
+        except (OSError, ValueError):
+            pass  # No (valid) manifest yet, everything will be exported
+
+    def is_up_to_date(self, exp_path: Union[str, Path], fingerprint: str) -> bool:
+        """
+        True if the file was exported with the same fingerprint, and wasn't modified (or deleted) since
+        """
+        entry = self.__entry_dict.get(Path(exp_path).name)
+        if entry is None or entry['fingerprint'] != fingerprint:
+            return False
+        try:
+            return os.stat(exp_path).st_mtime_ns == entry['mtime']
+        except OSError:
+            return False
+
+    def set_exported(self, exp_path: Union[str, Path], fingerprint: str):
+        try:
+            mtime = os.stat(exp_path).st_mtime_ns
+        except OSError:
+            return  # Not exported
+        self.__entry_dict[Path(exp_path).name] = {'fingerprint': fingerprint, 'mtime': mtime}
+
+    def save(self):
+        try:
+            with open(self.path, 'w', encoding='utf-8') as manifest_file:
+                json.dump(self.__entry_dict, manifest_file, indent=1)
+        except OSError as e:
+            log(Severity.WARNING, manifest_tool_name, f'Could not save export manifest "{self.path}": {e}')
+
+
+def get_fingerprint(exp_path: Union[str, Path], export_settings: ExportSettings, obj_lst: List,
+                    renamed_obj_set: Set) -> Optional[str]:
+    """
+    Content fingerprint of an export: its path, export settings and, for each object, its name, transforms, modifier
+    stack (and the objects it references), materials, vertex groups and data (mesh geometry, attributes, normals,
+    weights & shape keys, armature bones, animation if baked).
+    Objects of renamed_obj_set are renamed by the export, their names are compared without trailing numbers.
+    None if the export can't be fingerprinted (Geometry Nodes), it is then always exported.
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(str(exp_path).encode())
+    hasher.update(json.dumps(export_settings.to_json_dict(), sort_keys=True).encode())
+    data_hash_dict: Dict[Tuple[int, bool], str] = {}  # Data shared by multiple objects is only hashed once
+    for obj in obj_lst:
+        # Geometry Nodes inputs are ID properties of the modifier, and their node trees can read anything in the scene
+        if any(modifier.type == 'NODES' for modifier in obj.modifiers):
+            return None
+        hasher.update(_get_obj_signature(obj, export_settings, data_hash_dict, renamed_obj_set).encode())
+    return hasher.hexdigest()
+
+
+def _strip_name(name: str) -> str:
+    """
+    Object name without Blender's trailing numbers (.001), for objects the export renames (components, collisions)
+    """
+    return re.sub(r'\.\d{3}$', '', name)
+
+
+def _get_obj_name(obj, renamed_obj_set: Set) -> str:
+    return _strip_name(obj.name) if obj in renamed_obj_set else obj.name
+
+
+def _get_obj_signature(obj, export_settings: ExportSettings, data_hash_dict: Dict[Tuple[int, bool], str],
+                       renamed_obj_set: Set) -> str:
+    signature_lst = [_get_obj_name(obj, renamed_obj_set),
+                     obj.type,
+                     '' if obj.parent is None else _get_obj_name(obj.parent, renamed_obj_set),
+                     repr([round(value, 6) for row in obj.matrix_world for value in row]),
+                     repr([slot.material.name if slot.material is not None else '' for slot in obj.material_slots]),
+                     repr([vertex_group.name for vertex_group in obj.vertex_groups])]
+
+    # Modifier stack
+    for modifier in obj.modifiers:
+        for rna_property in modifier.bl_rna.properties:
+            if rna_property.type not in _MODIFIER_PROPERTY_TYPE_LST or rna_property.identifier == 'rna_type':
+                continue
+            value = getattr(modifier, rna_property.identifier)
+            if rna_property.type == 'POINTER':
+                value = _get_pointer_signature(value, data_hash_dict)
+            elif getattr(rna_property, 'is_array', False):
+                value = tuple(value)
+            signature_lst.append(f'{rna_property.identifier}={value!r}')
+
+    # Data
+    if obj.data is not None:
+        has_vertex_groups = len(obj.vertex_groups) > 0  # Weights are only exported through the object's groups
+        signature_lst.append(_get_shared_data_hash(obj, has_vertex_groups, data_hash_dict))
+
+    # Animation (only exported when baked)
+    if export_settings.bake_anim and obj.animation_data is not None and obj.animation_data.action is not None:
+        for fcurve in obj.animation_data.action.fcurves:
+            signature_lst.append(f'{fcurve.data_path}[{fcurve.array_index}]')
+            signature_lst.append(_hash_collection(fcurve.keyframe_points, 'co', 'f', 2))
+
+    return '|'.join(signature_lst)
+
+
+def _get_pointer_signature(value, data_hash_dict: Dict[Tuple[int, bool], str]) -> str:
+    """
+    Signature of an ID referenced by a modifier. Referenced objects (Boolean cutters, Mirror objects, etc.) and the
+    objects of referenced collections change the export's result with their transforms and data, not only their name.
+    """
+    if value is None:
+        return ''
+    if hasattr(value, 'all_objects'):  # Collection
+        return repr([_get_pointer_signature(obj, data_hash_dict) for obj in value.all_objects])
+    if hasattr(value, 'matrix_world'):  # Object
+        signature_lst = [value.name, repr([round(number, 6) for row in value.matrix_world for number in row])]
+        if value.data is not None:
+            signature_lst.append(_get_shared_data_hash(value, False, data_hash_dict))
+        return '/'.join(signature_lst)
+    return getattr(value, 'name', '')
+
+
+def _get_shared_data_hash(obj, has_vertex_groups: bool, data_hash_dict: Dict[Tuple[int, bool], str]) -> str:
+    data_key = (obj.data.as_pointer(), has_vertex_groups)
+    if data_key not in data_hash_dict:
+        data_hash_dict[data_key] = _get_data_hash(obj.data, obj.type, has_vertex_groups)
+    return data_hash_dict[data_key]
+
+
+def _get_data_hash(data, obj_type: str, has_vertex_groups: bool) -> str:
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(data.name.encode())
+    match obj_type:
+        case 'MESH':
+            hasher.update(_hash_collection(data.vertices, 'co', 'f', 3).encode())
+            hasher.update(_hash_collection(data.loops, 'vertex_index', 'i', 1).encode())
+            hasher.update(_hash_collection(data.polygons, 'loop_total', 'i', 1).encode())
+            hasher.update(_hash_collection(data.polygons, 'material_index', 'i', 1).encode())
+            hasher.update(_hash_collection(data.edges, 'vertices', 'i', 2).encode())
+            hasher.update(_hash_bool_collection(data.edges, 'use_edge_sharp').encode())
+            hasher.update(_hash_bool_collection(data.polygons, 'use_smooth').encode())
+            for uv_layer in data.uv_layers:
+                hasher.update(uv_layer.name.encode())
+                hasher.update(_hash_collection(uv_layer.data, 'uv', 'f', 2).encode())
+            for attribute in data.attributes:  # Sharp edges & faces (4.1+), creases, colors, custom attributes, etc.
+                if attribute.name.startswith('.'):
+                    continue  # Internal (selection, hidden, etc.), not exported
+                hasher.update(f'{attribute.name}:{attribute.domain}:{attribute.data_type}'.encode())
+                hasher.update(_hash_attribute(attribute).encode())
+            hasher.update(_hash_normals(data).encode())
+            if has_vertex_groups:
+                hasher.update(_hash_weights(data).encode())
+            hasher.update(_hash_shape_keys(data).encode())
+        case 'ARMATURE':
+            for bone in data.bones:
+                hasher.update(repr((bone.name, '' if bone.parent is None else bone.parent.name,
+                                    tuple(bone.head_local), tuple(bone.tail_local))).encode())
+    return hasher.hexdigest()
+
+
+def _hash_attribute(attribute) -> str:
+    """
+    Hash the values of a mesh attribute (generic attributes API)
+    """
+    if attribute.data_type == 'BOOLEAN':
+        return _hash_bool_collection(attribute.data, 'value')
+    if attribute.data_type not in _ATTRIBUTE_FOREACH_DICT:
+        return ''  # Not exported (ex. strings)
+    attribute_name, type_code, size = _ATTRIBUTE_FOREACH_DICT[attribute.data_type]
+    return _hash_collection(attribute.data, attribute_name, type_code, size)
+
+
+def _hash_normals(data) -> str:
+    """
+    Hash the custom split normals (their effect on the corner normals), if the mesh has any
+    """
+    if not data.has_custom_normals:
+        return ''
+    if hasattr(data, 'corner_normals'):  # 4.1+
+        return _hash_collection(data.corner_normals, 'vector', 'f', 3)
+    data.calc_normals_split()
+    return _hash_collection(data.loops, 'normal', 'f', 3)
+
+
+def _hash_weights(data) -> str:
+    """
+    Hash the vertex group weights (not available through foreach_get, read vertex by vertex)
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    for vertex in data.vertices:
+        for group_element in vertex.groups:
+            hasher.update(repr((vertex.index, group_element.group, round(group_element.weight, 6))).encode())
+    return hasher.hexdigest()
+
+
+def _hash_shape_keys(data) -> str:
+    if data.shape_keys is None:
+        return ''
+    hasher = hashlib.blake2b(digest_size=16)
+    for key_block in data.shape_keys.key_blocks:
+        hasher.update(repr((key_block.name, key_block.value, key_block.mute, key_block.relative_key.name,
+                            key_block.slider_min, key_block.slider_max, key_block.vertex_group)).encode())
+        hasher.update(_hash_collection(key_block.data, 'co', 'f', 3).encode())
+    return hasher.hexdigest()
+
+
+def _hash_collection(collection, attribute: str, type_code: str, size: int) -> str:
+    """
+    Hash an attribute of every item of a Blender collection, read in a single foreach_get call
+    """
+    buffer = array.array(type_code, [0]) * (len(collection) * size)
+    collection.foreach_get(attribute, buffer)
+    return hashlib.blake2b(buffer.tobytes(), digest_size=16).hexdigest()
+
+
+def _hash_bool_collection(collection, attribute: str) -> str:
+    """
+    Same as _hash_collection, for boolean attributes (read in a list, array has no bool type foreach_get accepts)
+    """
+    buffer = [False] * len(collection)
+    collection.foreach_get(attribute, buffer)
+    return hashlib.blake2b(bytes(buffer), digest_size=16).hexdigest()
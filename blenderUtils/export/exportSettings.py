@@ -16,9 +16,10 @@ __status__ = 'Production'
 # IMPORTS
 
 # System
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from enum import Enum
 from pathlib import Path
+from typing import *
 
 # ----------------------------------------------------------------------------------------------------------------------
 # CODE
@@ -52,3 +53,14 @@ class ExportSettings:
 
     # Engine
     engine: Engine
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        """ JSON-friendly dict of the settings (ex. to hand them to a background Blender process). """
+        json_dict = asdict(self)
+        json_dict['exp_dir'] = str(self.exp_dir)
+        json_dict['engine'] = self.engine.value
+        return json_dict
+
+    @classmethod
+    def from_json_dict(cls, json_dict: Dict[str, Any]) -> 'ExportSettings':
+        return cls(**{**json_dict, 'exp_dir': Path(json_dict['exp_dir']), 'engine': Engine(json_dict['engine'])})
@@ -0,0 +1,60 @@
+"""
+Background worker of the parallel Asset Hierarchy export (see exportHierarchy.AssetHierarchies.export_parallel).
+Not imported by the addon: Blender runs it in background mode, on a snapshot of the scene, with a job file:
+blender -b <snapshot.blend> --python exportWorker.py -- <job.json>
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# AUTHORSHIP INFORMATION - THIS FILE BELONGS TO THE BLUE HOLE BLENDER PLUGIN https://blue-hole.weebly.com
+
+__author__ = 'Marc-André Voyer'
+__copyright__ = 'Copyright (C) 2020-2026, Marc-André Voyer'
+__license__ = "MIT License"
+__maintainer__ = 'Marc-André Voyer'
+__email__ = 'marcandre.voyer@gmail.com'
+__status__ = 'Production'
+
+# ----------------------------------------------------------------------------------------------------------------------
+# IMPORTS
+
+# System
+import importlib
+import json
+import sys
+import traceback
+
+# Blender
+import bpy
+
+# ----------------------------------------------------------------------------------------------------------------------
+# CODE
+
+
+def main():
+    job_file_path = sys.argv[sys.argv.index('--') + 1]
+    with open(job_file_path, encoding='utf-8') as job_file:
+        job = json.load(job_file)
+
+    # The addon is enabled in the worker too (user preferences are loaded), import it by its package name. Its handlers
+    # may be registered as well, they skip background instances (no source control prompts, no scene tracking)
+    export_hierarchy = importlib.import_module(f'{job["package"]}.blenderUtils.export.exportHierarchy')
+    export_settings = export_hierarchy.ExportSettings.from_json_dict(job['export_settings'])
+
+    # Same as an in-process batch (see AssetHierarchies.export), checks were already run by the main Blender instance
+    export_hierarchy.sceneUtils.set_object_mode()
+    export_hierarchy.sceneUtils.deselect_all()
+    selected_obj_set = set()
+    result_lst = []
+    for root_name in job['root_name_lst']:
+        try:
+            hierarchy = export_hierarchy.AssetHierarchy(bpy.data.objects[root_name], export_settings)
+            success = hierarchy.export_obj_lst(False, hierarchy.get_obj_lst(), selected_obj_set)
+            result_lst.append({'name': root_name, 'success': success, 'error': None})
+        except Exception:
+            result_lst.append({'name': root_name, 'success': False, 'error': traceback.format_exc()})
+
+    with open(job['result_file_path'], 'w', encoding='utf-8') as result_file:
+        json.dump(result_lst, result_file)
+
+
+main()
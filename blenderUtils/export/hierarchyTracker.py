@@ -0,0 +1,106 @@
+"""
+Live tracking of the Asset Hierarchies modified in the scene (dirty), fed by Blender's depsgraph updates (see
+callbacks.py), so the modified ones can be exported without scanning the scene at export time.
+"""
+
+# ----------------------------------------------------------------------------------------------------------------------
+# AUTHORSHIP INFORMATION - THIS FILE BELONGS TO THE BLUE HOLE BLENDER PLUGIN https://blue-hole.weebly.com
+
+__author__ = 'Marc-André Voyer'
+__copyright__ = 'Copyright (C) 2020-2026, Marc-André Voyer'
+__license__ = "MIT License"
+__maintainer__ = 'Marc-André Voyer'
+__email__ = 'marcandre.voyer@gmail.com'
+__status__ = 'Production'
+
+# ----------------------------------------------------------------------------------------------------------------------
+# IMPORTS
+
+# System
+from typing import *
+
+# Blender
+import bpy
+
+# Blue Hole
+from ...Lib.commonUtils.debugUtils import *
+from .. import objectUtils
+
+# ----------------------------------------------------------------------------------------------------------------------
+# CODE
+
+tracker_tool_name = 'Asset Hierarchy Tracker'
+
+
+class HierarchyTracker:
+    """
+    Keeps the roots (upmost parents) of the objects modified since they were last exported. Roots are kept by
+    session_uid, so renaming a root keeps it dirty. Roots that lost objects (removed or re-parented) are known through
+    the scene hierarchy index (see objectUtils.SceneHierarchyIndex).
+    """
+
+    def __init__(self):
+        self.__dirty_root_uid_set: Set[int] = set()
+        # Roots just exported: the export's own changes (root transform zeroed & restored, collision renames) are only
+        # delivered once the export is done, they are ignored until then (see set_clean)
+        self.__exported_root_uid_set: Set[int] = set()
+
+    def reset(self):
+        """ Forget everything (new file loaded) """
+        self.__dirty_root_uid_set = set()
+        self.__exported_root_uid_set = set()
+
+    def on_depsgraph_update(self, depsgraph, changed_root_uid_set: Set[int]):
+        """
+        :param changed_root_uid_set: session_uids of the roots that lost objects (removed or re-parented out of the
+        hierarchy), see SceneHierarchyIndex.on_depsgraph_update
+        """
+        for root_uid in changed_root_uid_set:
+            self.__set_dirty(root_uid)
+        if not depsgraph.id_type_updated('OBJECT'):
+            return
+
+        for update in depsgraph.updates:
+            if not isinstance(update.id, bpy.types.Object):
+                continue
+            # Selection and renames also send updates, only keep the ones changing what gets exported
+            if not (update.is_updated_transform or update.is_updated_geometry):
+                continue
+            self.__set_dirty(objectUtils.get_obj_upmost_parent(update.id.original).session_uid)
+
+    def __set_dirty(self, root_uid: int):
+        if root_uid not in self.__exported_root_uid_set:
+            self.__dirty_root_uid_set.add(root_uid)
+
+    def get_dirty_root_obj_lst(self) -> List:
+        """ Root objects (still in the scene) of the objects modified since they were last exported """
+        return [obj for obj in bpy.data.objects if obj.session_uid in self.__dirty_root_uid_set]
+
+    def set_clean(self, root_obj_lst: List):
+        """
+        To call once roots are exported. Updates of these roots are ignored until the export's own changes are
+        delivered (after the operator, on the next depsgraph evaluation), so they don't set them dirty again.
+        """
+        root_uid_set = {root_obj.session_uid for root_obj in root_obj_lst}
+        self.__dirty_root_uid_set.difference_update(root_uid_set)
+        self.__exported_root_uid_set.update(root_uid_set)
+        if not bpy.app.timers.is_registered(_end_export_timer):
+            bpy.app.timers.register(_end_export_timer, first_interval=0.0)
+        log(Severity.DEBUG, tracker_tool_name, f'{len(self.__dirty_root_uid_set)} modified root(s) left to export')
+
+    def end_export(self):
+        """ Stop ignoring the updates of the roots just exported """
+        self.__exported_root_uid_set = set()
+
+
+_HIERARCHY_TRACKER: HierarchyTracker = HierarchyTracker()
+
+
+def get_hierarchy_tracker() -> HierarchyTracker:
+    return _HIERARCHY_TRACKER
+
+
+def _end_export_timer() -> None:
+    """ Runs once back in Blender's main loop, after the depsgraph evaluation that follows the export """
+    _HIERARCHY_TRACKER.end_export()
+    return None
@@ -215,7 +215,7 @@ def check_tests(script_name,
 
     # Check source control connection
     if check_source_control_connection:
-        p4_info_cls = perforceWrapper.P4Info()
+        p4_info_cls = perforceWrapper.get_p4_info()
         if p4_info_cls.status is False:
             log(Severity.ERROR, script_name, 'Check Source Control Connection: Failed')
             dialog_source_control_connection()
@@ -15,6 +15,8 @@ __status__ = 'Production'
 # ----------------------------------------------------------------------------------------------------------------------
 # IMPORTS
 
+from typing import *
+
 import mathutils as mathutils
 
 import bpy
@@ -33,6 +35,139 @@ show_verbose = True
 # ----------------------------------------------------------------------------------------------------------------------
 # CODE
 
+class SceneHierarchyIndex:
+    """
+    Parent and root of every object (bpy.data.objects), by session_uid (stable through renames). Built in one pass and
+    kept up to date on depsgraph updates (see on_depsgraph_update), which report the roots objects were removed from
+    or re-parented out of, as they were before the change. Within an operator or script, objects can change before
+    any depsgraph update, so entries are checked against the objects' current parents before being used (see
+    get_root_lst).
+    """
+
+    def __init__(self):
+        self.__valid: bool = False
+        self.__obj_dict: Dict[int, Any] = {}  # Object session_uid: Object
+        self.__parent_uid_dict: Dict[int, Optional[int]] = {}  # Object session_uid: Parent session_uid
+        self.__root_uid_dict: Dict[int, int] = {}  # Object session_uid: Root (upmost parent) session_uid
+        self.__root_uid_by_type_dict: Dict[str, List[int]] = {}  # Object type: Root session_uids
+        # Roots that lost objects, found by get_root_lst before the depsgraph update did (see on_depsgraph_update)
+        self.__pending_changed_root_uid_set: Set[int] = set()
+
+    def rebuild(self):
+        """ Index the objects as they are now (new file loaded, undo/redo) """
+        self.__pending_changed_root_uid_set = set()
+        self.__build()
+
+    def __build(self):
+        self.__obj_dict = {}
+        self.__parent_uid_dict = {}
+        for obj in bpy.data.objects:
+            self.__obj_dict[obj.session_uid] = obj
+            self.__parent_uid_dict[obj.session_uid] = None if obj.parent is None else obj.parent.session_uid
+
+        self.__root_uid_dict = {}
+        self.__root_uid_by_type_dict = {}
+        for obj_uid, parent_uid in self.__parent_uid_dict.items():
+            if parent_uid is None:
+                self.__root_uid_by_type_dict.setdefault(self.__obj_dict[obj_uid].type, []).append(obj_uid)
+            # Walk up until an object whose root is already known (or a root), then set it for the whole chain
+            chain_lst = []
+            uid = obj_uid
+            while uid not in self.__root_uid_dict:
+                chain_lst.append(uid)
+                if self.__parent_uid_dict[uid] is None:
+                    self.__root_uid_dict[uid] = uid
+                    break
+                uid = self.__parent_uid_dict[uid]
+            root_uid = self.__root_uid_dict[uid]
+            for chain_uid in chain_lst:
+                self.__root_uid_dict[chain_uid] = root_uid
+
+        self.__valid = True
+
+    def __is_up_to_date(self) -> bool:
+        """
+        Every object is indexed under its current parent (objects added, removed or re-parented since the last
+        depsgraph update would not be)
+        """
+        if not self.__valid or len(bpy.data.objects) != len(self.__parent_uid_dict):
+            return False
+        parent_uid_dict = self.__parent_uid_dict
+        for obj in bpy.data.objects:
+            parent = obj.parent
+            if parent_uid_dict.get(obj.session_uid, 0) != (None if parent is None else parent.session_uid):
+                return False
+        return True
+
+    def __get_changed_root_uid_set(self) -> Set[int]:
+        """ Roots of the indexed objects since removed or re-parented, comparing every object """
+        changed_root_uid_set = set()
+        obj_uid_set = set()
+        for obj in bpy.data.objects:
+            obj_uid = obj.session_uid
+            obj_uid_set.add(obj_uid)
+            parent_uid = None if obj.parent is None else obj.parent.session_uid
+            if self.__parent_uid_dict.get(obj_uid, parent_uid) != parent_uid:
+                changed_root_uid_set.add(self.__root_uid_dict[obj_uid])
+        for removed_uid in self.__parent_uid_dict.keys() - obj_uid_set:
+            changed_root_uid_set.add(self.__root_uid_dict[removed_uid])
+        return changed_root_uid_set
+
+    def get_root_lst(self, obj_type: str) -> List:
+        """ Objects without a parent, of the given type ('EMPTY', 'MESH', etc.) """
+        if not self.__is_up_to_date():
+            if self.__valid:
+                self.__pending_changed_root_uid_set.update(self.__get_changed_root_uid_set())
+            self.__build()
+        return [self.__obj_dict[uid] for uid in self.__root_uid_by_type_dict.get(obj_type, [])]
+
+    def on_depsgraph_update(self, depsgraph) -> Set[int]:
+        """
+        Update the index if objects were added, removed or re-parented.
+        :return: session_uids of the roots the removed and re-parented objects were under (before the change)
+        """
+        changed_root_uid_set = self.__pending_changed_root_uid_set
+        self.__pending_changed_root_uid_set = set()
+        if not self.__valid:
+            self.__build()  # Nothing known to compare with yet
+            return changed_root_uid_set
+
+        is_changed = False
+        is_obj_added = False
+        if depsgraph.id_type_updated('OBJECT'):
+            for update in depsgraph.updates:
+                if not isinstance(update.id, bpy.types.Object):
+                    continue
+                obj = update.id.original
+                obj_uid = obj.session_uid
+                if obj_uid not in self.__parent_uid_dict:
+                    is_obj_added = True
+                    continue
+                parent_uid = None if obj.parent is None else obj.parent.session_uid
+                if self.__parent_uid_dict[obj_uid] != parent_uid:
+                    changed_root_uid_set.add(self.__root_uid_dict[obj_uid])
+                    is_changed = True
+
+        # Removed objects don't get updates: look for them when the count changed, or when an object was added (which
+        # can hide a removal in the count)
+        if is_obj_added or len(bpy.data.objects) != len(self.__parent_uid_dict):
+            obj_uid_set = {obj.session_uid for obj in bpy.data.objects}
+            for removed_uid in self.__parent_uid_dict.keys() - obj_uid_set:
+                changed_root_uid_set.add(self.__root_uid_dict[removed_uid])
+            is_changed = True
+
+        if is_changed:
+            self.__build()
+        return changed_root_uid_set
+
+
+_SCENE_HIERARCHY_INDEX: SceneHierarchyIndex = SceneHierarchyIndex()
+
+
+def get_scene_hierarchy_index() -> SceneHierarchyIndex:
+    return _SCENE_HIERARCHY_INDEX
+
+
 def deselect_all():
     """
     Deselects everything
@@ -182,22 +317,13 @@ def get_obj_child_recursive(obj):
     :type obj: Object
     :rtype: lst of Objects
     """
+    # Walked live (not from the SceneHierarchyIndex), so it's right even within an operator that just re-parented
     child_recursive_lst = []
-
-    def obj_append_get_child(child_obj):
-        """
-        Function to execute over and over again as long as Object has children
-        :param child_obj: Object to execute the function on
-        :type child_obj: Object
-        """
-        if child_obj is not obj:
-            child_recursive_lst.append(child_obj)
-        child_obj_lst = get_obj_child(child_obj)
-        if len(child_obj_lst) > 0:
-            for child in child_obj_lst:
-                obj_append_get_child(child)
-
-    obj_append_get_child(obj)
+    obj_stack = list(reversed(get_obj_child(obj)))
+    while obj_stack:
+        child_obj = obj_stack.pop()
+        child_recursive_lst.append(child_obj)
+        obj_stack.extend(reversed(get_obj_child(child_obj)))
     return child_recursive_lst
 
 
@@ -209,25 +335,18 @@ def get_obj_parent(obj):
 
 
 def get_obj_upmost_parent(obj):
-    obj_parent = get_obj_parent(obj)
-    if obj_parent is not None:
-        return get_obj_upmost_parent(obj_parent)
-    else:
-        return obj
+    # Walked live, a few parents at most
+    while obj.parent is not None:
+        obj = obj.parent
+    return obj
 
 
 def get_obj_root_lst_type_empty():
     """
     Get a list of the objects at the root of the scene of type 'EMPTY'
     """
-    scene_obj_lst = sceneUtils.get_scene_obj_lst()
-    scene_root_lst = []
-    for scene_obj in scene_obj_lst:
-        upmost_parent_obj = get_obj_upmost_parent(scene_obj)
-        if upmost_parent_obj not in scene_root_lst:
-            if 'EMPTY' in get_obj_type(upmost_parent_obj):
-                scene_root_lst.append(upmost_parent_obj)
-    return scene_root_lst
+    scene_obj_set = set(sceneUtils.get_scene_obj_lst())
+    return [root_obj for root_obj in get_scene_hierarchy_index().get_root_lst('EMPTY') if root_obj in scene_obj_set]
 
 
 def delete_obj(obj):
@@ -33,13 +33,11 @@ def set_object_mode():
     """
     Set the mode to object mode, regardless of current context
     """
-    scene_lst = get_scene_obj_lst()
-    scene_msh_amt = 0
-    for obj in scene_lst:
-        if 'MESH' in obj.type:
-            scene_msh_amt += 1
-    # If scene is empty, already in a sort-of object mode. Will throw error if try to set it.
-    if scene_msh_amt > 0:
+    # Already in object mode, nothing to do
+    if bpy.context.mode == 'OBJECT':
+        return
+    # If scene is empty, already in a sort-of object mode. Will throw error if try to set it. Stops at first mesh found.
+    if any('MESH' in obj.type for obj in get_scene_obj_lst()):
         try:
             bpy.ops.object.mode_set(mode='OBJECT', toggle=False)
         except:
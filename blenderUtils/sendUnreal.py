@@ -17,7 +17,9 @@ __status__ = 'Production'
 
 # System
 from pathlib import Path
+import json
 import time
+from typing import *
 
 # Blue Hole
 from ..Lib.commonUtils.debugUtils import *
@@ -32,6 +34,9 @@ from ..environment import envPathResolver
 unreal_response = ''
 send_ue_name = 'Blue Hole Bridge to Unreal'
 
+# Prefix of the line printed by Unreal with the result of each import (see import_asset_lst)
+_IMPORT_RESULT_PREFIX = 'BLUE_HOLE_IMPORT_RESULT:'
+
 
 def trigger_unreal_import(file_path_source):
     """
@@ -39,6 +44,18 @@ def trigger_unreal_import(file_path_source):
     :param file_path_source: Source file to import
     :type file_path_source: str
     """
+    result = trigger_unreal_import_lst([file_path_source])[0]
+    if not result:
+        log(Severity.CRITICAL, send_ue_name, 'Command did not succeed!')
+    return result
+
+
+def trigger_unreal_import_lst(file_path_source_lst: List[str]) -> List[bool]:
+    """
+    Send a single import command to Unreal for all the source files (over a single connection)
+    :param file_path_source_lst: Source files to import
+    :return: Whether each source file was imported. Failures are logged without raising, the caller reports them.
+    """
 
     def display_path_error_source_content(path):
         err_msg = ('The Source Content directory path specified in the active environment\'s env_variables.ini file '
@@ -65,7 +82,7 @@ def trigger_unreal_import(file_path_source):
     # Validate this path is valid, else throw error
     if not sc_path:
         display_path_error_source_content(sc_path)
-        return False
+        return [False] * len(file_path_source_lst)
     else:
         sc_path_str = str(sc_path)
 
@@ -73,29 +90,30 @@ def trigger_unreal_import(file_path_source):
     check_result = filterUtils.check_tests('Export Asset Hierarchy',
                                            check_blend_exist=True)
     if not check_result:
-        return False
+        return [False] * len(file_path_source_lst)
 
     # Validate currently opened blend file is within SourceContent
     blend_path = str(Path(blenderFile.get_blend_directory_path()))
     if sc_path_str not in blend_path:
         display_path_error_blend(sc_path_str, blend_path)
-        return False
+        return [False] * len(file_path_source_lst)
 
     # ------------------------------------------------------------------------------------------------------------------
     # Know everything is valid, send command to Unreal.
 
-    file_path_dest = file_path_source.replace(sc_path_str, '/Game')
+    file_path_pair_lst = []
+    for file_path_source in file_path_source_lst:
+        file_path_dest = file_path_source.replace(sc_path_str, '/Game')
+        msg = f'Triggering Unreal import of source file: "{file_path_source}" to "{file_path_dest}".'
+        log(Severity.DEBUG, send_ue_name, msg)
+        file_path_pair_lst.append((str(Path(file_path_source)), str(Path(file_path_dest))))
 
-    msg = f'Triggering Unreal import of source file: "{file_path_source}" to "{file_path_dest}".'
-    log(Severity.DEBUG, send_ue_name, msg)
-
-    result = import_asset(str(Path(file_path_source)), str(Path(file_path_dest)))
-    if not result:
-        log(Severity.CRITICAL, send_ue_name, 'Command did not succeed!')
-        return False
-
-    log(Severity.DEBUG, send_ue_name, 'Command succeeded!')
-    return True
+    result_lst = import_asset_lst(file_path_pair_lst)
+    if not all(result_lst):
+        log(Severity.ERROR, send_ue_name, f'Command did not succeed for {result_lst.count(False)} file(s)!')
+    else:
+        log(Severity.DEBUG, send_ue_name, 'Command succeeded!')
+    return result_lst
 
 
 def display_cannot_connect_unreal_error():
@@ -110,91 +128,123 @@ def import_asset(file_path_source, file_path_dest):
     """
     This function imports an asset to unreal
     """
+    return import_asset_lst([(file_path_source, file_path_dest)])[0]
+
+
+def import_asset_lst(file_path_pair_lst: List[Tuple[str, str]]) -> List[bool]:
+    """
+    Import assets to Unreal: Unreal is found once, then sent a single command building all the import tasks, which are
+    imported by a single import_asset_tasks call.
+    :param file_path_pair_lst: Source file path and destination path of each asset to import
+    :return: Whether each asset was imported
+    """
     # start a connection to the engine that lets you send python strings
     remote_exec = remote_execution.RemoteExecution()
     remote_exec.start()
     # Fetch properties
     log(Severity.DEBUG, send_ue_name, 'Fetching Properties...')
 
-    # Was it a skeletal?
-    sk_prefix = prefs().env.asset_hierarchy_struct_prefix_skeletal_mesh
-    if sk_prefix == file_path_source.split('/')[-1][0:len(sk_prefix)]:
-        log(Severity.DEBUG, send_ue_name, 'Export is a Skeletal Mesh')
-        is_skeletal = True
-    else:
-        log(Severity.DEBUG, send_ue_name, 'Export is a Static Mesh')
-        is_skeletal = False
-
     # Is importing animations?
     include_animation = prefs().general.ue_bridge_include_animation
 
-    # Make sure \\ on paths
-    file_path_source = file_path_source.replace('\\', '\\\\')
-    file_path_dest = file_path_dest.replace('\\', '/')
-
-    file_path_dest = file_path_dest[0:-len(file_path_dest.split('/')[-1])]
+    # Source file path, destination directory and whether it is a skeletal mesh, for each asset
+    sk_prefix = prefs().env.asset_hierarchy_struct_prefix_skeletal_mesh
+    import_arg_lst = []
+    for file_path_source, file_path_dest in file_path_pair_lst:
+        file_path_dest = file_path_dest.replace('\\', '/')
+        file_path_dest = file_path_dest[0:-len(file_path_dest.split('/')[-1])]
+        # Was it a skeletal?
+        is_skeletal = sk_prefix == file_path_source.split('/')[-1][0:len(sk_prefix)]
+        log(Severity.DEBUG, send_ue_name, f'Export is a {"Skeletal" if is_skeletal else "Static"} Mesh')
+        import_arg_lst.append((file_path_source, file_path_dest, is_skeletal))
 
     # send over the python code as a string
-    run_unreal_python_commands(
+    global unreal_response
+    unreal_response = ''
+    connected = run_unreal_python_commands(
         remote_exec,
         '\n'.join([
-            f'import_task = unreal.AssetImportTask()',
-            f'import_task.filename = r"{file_path_source}"',
-            f'import_task.destination_path = r"{file_path_dest}"',
-            f'import_task.automated = {prefs().general.ue_automated}',
-            f'import_task.replace_existing = True',
-            f'options = unreal.FbxImportUI()',
-            f'options.auto_compute_lod_distances = False',
-            f'options.lod_number = 0',
-            f'options.import_as_skeletal = {is_skeletal}',
-            f'options.import_animations = {include_animation}',
-            f'options.import_materials = {prefs().general.ue_import_materials}',
-            f'options.import_textures = {prefs().general.ue_import_textures}',
-            f'options.import_mesh = {True}',
-            f'options.static_mesh_import_data.generate_lightmap_u_vs = False',
-            f'options.lod_distance0 = 1.0',
+            f'import json',
+            f'def create_import_task(file_path_source, file_path_dest, is_skeletal):',
+            f'\timport_task = unreal.AssetImportTask()',
+            f'\timport_task.filename = file_path_source',
+            f'\timport_task.destination_path = file_path_dest',
+            f'\timport_task.automated = {prefs().general.ue_automated}',
+            f'\timport_task.replace_existing = True',
+            f'\toptions = unreal.FbxImportUI()',
+            f'\toptions.auto_compute_lod_distances = False',
+            f'\toptions.lod_number = 0',
+            f'\toptions.import_as_skeletal = is_skeletal',
+            f'\toptions.import_animations = {include_animation}',
+            f'\toptions.import_materials = {prefs().general.ue_import_materials}',
+            f'\toptions.import_textures = {prefs().general.ue_import_textures}',
+            f'\toptions.import_mesh = {True}',
+            f'\toptions.static_mesh_import_data.generate_lightmap_u_vs = False',
+            f'\toptions.lod_distance0 = 1.0',
 
             # if this is a skeletal mesh import
-            f'if {is_skeletal}:',
-            f'\toptions.mesh_type_to_import = unreal.FBXImportType.FBXIT_SKELETAL_MESH',
-            f'\toptions.skeletal_mesh_import_data.import_mesh_lo_ds = {False}',
+            f'\tif is_skeletal:',
+            f'\t\toptions.mesh_type_to_import = unreal.FBXImportType.FBXIT_SKELETAL_MESH',
+            f'\t\toptions.skeletal_mesh_import_data.import_mesh_lo_ds = {False}',
 
             # if this is an static mesh import
-            f'if {not is_skeletal}:',
-            f'\toptions.mesh_type_to_import = unreal.FBXImportType.FBXIT_STATIC_MESH',
-            f'\toptions.static_mesh_import_data.import_mesh_lo_ds = {False}',
-            f'\toptions.static_mesh_import_data.set_editor_property("combine_meshes", True)',
+            f'\telse:',
+            f'\t\toptions.mesh_type_to_import = unreal.FBXImportType.FBXIT_STATIC_MESH',
+            f'\t\toptions.static_mesh_import_data.import_mesh_lo_ds = {False}',
+            f'\t\toptions.static_mesh_import_data.set_editor_property("combine_meshes", True)',
 
             # if this is an animation import
-            f'if {include_animation}:',
-            f'\tskeleton_asset = unreal.load_asset(r"{file_path_dest}")',
+            f'\tif {include_animation}:',
+            f'\t\tskeleton_asset = unreal.load_asset(file_path_dest)',
 
             # if a skeleton can be loaded from the provided path
-            f'\tif skeleton_asset:',
-            f'\t\toptions.set_editor_property("skeleton", skeleton_asset)',
-            f'\t\toptions.set_editor_property("original_import_type", unreal.FBXImportType.FBXIT_ANIMATION)',
-            f'\t\toptions.set_editor_property("mesh_type_to_import", unreal.FBXImportType.FBXIT_ANIMATION)',
-            f'\t\toptions.anim_sequence_import_data.set_editor_property("preserve_local_transform", True)',
-            f'\telse:',
-            f'\t\traise RuntimeError("Unreal could not find a skeleton here: {file_path_dest}")',
-
-            # assign the options object to the import task and import the asset
-            f'import_task.options = options',
-            f'unreal.AssetToolsHelpers.get_asset_tools().import_asset_tasks([import_task])',
-
-            # check for a that the game asset imported correctly if the import object name as is False
-            f'if {False}:',
-            f'\tgame_asset = unreal.load_asset(r"{file_path_dest}")',
-            f'\tif not game_asset:',
-            f'\t\traise RuntimeError("Multiple roots are found in the bone hierarchy. Unreal will only support a single root bone.")',
+            f'\t\tif skeleton_asset:',
+            f'\t\t\toptions.set_editor_property("skeleton", skeleton_asset)',
+            f'\t\t\toptions.set_editor_property("original_import_type", unreal.FBXImportType.FBXIT_ANIMATION)',
+            f'\t\t\toptions.set_editor_property("mesh_type_to_import", unreal.FBXImportType.FBXIT_ANIMATION)',
+            f'\t\t\toptions.anim_sequence_import_data.set_editor_property("preserve_local_transform", True)',
+            f'\t\telse:',
+            f'\t\t\traise RuntimeError("Unreal could not find a skeleton here: " + file_path_dest)',
+
+            # assign the options object to the import task
+            f'\timport_task.options = options',
+            f'\treturn import_task',
+
+            # create the import tasks (an asset that fails doesn't prevent the others from being imported)
+            f'import_task_lst = []',
+            f'error_lst = []',
+            f'for import_args in {import_arg_lst!r}:',
+            f'\ttry:',
+            f'\t\timport_task_lst.append(create_import_task(*import_args))',
+            f'\t\terror_lst.append(None)',
+            f'\texcept Exception as e:',
+            f'\t\timport_task_lst.append(None)',
+            f'\t\terror_lst.append(str(e))',
+
+            # import all the assets at once
+            f'unreal.AssetToolsHelpers.get_asset_tools().import_asset_tasks([t for t in import_task_lst if t is not None])',
+
+            # report the result of each import
+            f'for index, import_task in enumerate(import_task_lst):',
+            f'\tif import_task is not None and not getattr(import_task, "imported_object_paths", [None]):',
+            f'\t\terror_lst[index] = "Nothing was imported from " + import_task.filename',
+            f'print("{_IMPORT_RESULT_PREFIX}" + json.dumps(error_lst))',
         ]))
 
     # if there is an error report it
-    if unreal_response:
-        if unreal_response['result'] != 'None':
-            display_cannot_connect_unreal_error()
-            return False
-    return True
+    if not connected or not unreal_response:
+        return [False] * len(file_path_pair_lst)
+    if unreal_response['result'] != 'None':
+        log(Severity.CRITICAL, send_ue_name, f'Unreal import failed: {unreal_response["result"]}')
+        return [False] * len(file_path_pair_lst)
+    error_lst = [None] * len(file_path_pair_lst)
+    for output in unreal_response.get('output', []):
+        if output['output'].startswith(_IMPORT_RESULT_PREFIX):
+            error_lst = json.loads(output['output'][len(_IMPORT_RESULT_PREFIX):])
+    for (file_path_source, _), error in zip(file_path_pair_lst, error_lst):
+        if error is not None:
+            log(Severity.ERROR, send_ue_name, f'Could not import "{file_path_source}": {error}')
+    return [error is None for error in error_lst]
 
 
 def run_unreal_python_commands(remote_exec, commands, failed_connection_attempts=0):
@@ -222,7 +272,7 @@ def run_unreal_python_commands(remote_exec, commands, failed_connection_attempts
         # otherwise make an other attempt to connect to the engine
         else:
             if failed_connection_attempts < 10:
-                run_unreal_python_commands(remote_exec, commands, failed_connection_attempts + 1)
+                return run_unreal_python_commands(remote_exec, commands, failed_connection_attempts + 1)
             else:
                 remote_exec.stop()
                 display_cannot_connect_unreal_error()
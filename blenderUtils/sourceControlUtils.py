@@ -16,16 +16,35 @@ __status__ = 'Production'
 # ----------------------------------------------------------------------------------------------------------------------
 # IMPORTS
 
+# System
+import os
+import queue
+import threading
+import time
+from typing import *
+from pathlib import Path
+
+# Blender
+import bpy
+
 # Blue Hole
 from ..wrappers import perforceWrapper as p4Wrapper
 from . import filterUtils, blenderFile
+from ..Lib.commonUtils.debugUtils import *
 from ..preferences.prefs import *
 
+# ----------------------------------------------------------------------------------------------------------------------
+# USER DEFINED VARIABLES
+tool_name = 'Blue Hole [Source Control]'
+blend_status_max_age = 120  # Seconds a background-fetched status of the .blend is trusted for when saving
+blend_status_refresh_interval = 60  # Seconds between background refreshes of the .blend status
+export_changelist_description = 'Blue Hole Export'  # Perforce: description of the export changelist (+ .blend name), when enabled in preferences
+
 # ----------------------------------------------------------------------------------------------------------------------
 # CODE
 
 
-def sc_open_edit_file_path_lst(file_path_lst):
+def sc_open_edit_file_path_lst(file_path_lst, p4_changelist: Optional[p4Wrapper.P4Changelist] = None):
     """
     Depending on enabled source control solution, will redirect to proper source control solution
     """
@@ -35,7 +54,7 @@ def sc_open_edit_file_path_lst(file_path_lst):
             p4_file_grp_cls = p4Wrapper.P4FileGroup()
             for file_path in file_path_lst:
                 p4_file_grp_cls.append_p4_file_to_group_from_client_file(str(file_path))
-            result = p4_file_grp_cls.open_for_edit()
+            result = p4_file_grp_cls.open_for_edit(p4_changelist)
             return result
         elif prefs().sc.source_control_solution == 'plastic-scm':
             return True  # By default there is nothing to do for plastic SCM to do its job
@@ -45,6 +64,42 @@ def sc_open_edit_file_path_lst(file_path_lst):
         return True  # Return True since ran as intended (nothing to do; skip)
 
 
+class ScExportBatch:
+    """
+    Source control side of a batch export: opens all the exported files for edit at once (for Perforce, in a numbered
+    pending changelist of its own if enabled in preferences), then shelves or submits them once exported (as set in
+    preferences).
+    """
+
+    def __init__(self, file_path_lst: List[Union[str, Path]]):
+        self.file_path_lst = file_path_lst
+        self.p4_changelist: Optional[p4Wrapper.P4Changelist] = None
+
+    def open_for_edit(self) -> bool:
+        if (filterUtils.filter_source_control() and prefs().sc.source_control_solution == 'perforce'
+                and prefs().sc.p4_export_changelist_enable):
+            blend_file_name = os.path.basename(blenderFile.get_blend_file_path())
+            p4_changelist = p4Wrapper.P4Changelist(f'{export_changelist_description} [{blend_file_name}]')
+            if p4_changelist.open_or_create():
+                self.p4_changelist = p4_changelist
+            else:
+                log(Severity.WARNING, tool_name, 'Could not get export changelist, using default changelist instead.')
+        return sc_open_edit_file_path_lst(self.file_path_lst, self.p4_changelist)
+
+    def complete(self) -> bool:
+        """
+        Once the files are exported, shelve or submit the changelist (as configured)
+        """
+        if self.p4_changelist is None:
+            return True
+        match prefs().sc.p4_export_changelist_action:
+            case 'shelve':
+                return self.p4_changelist.shelve()
+            case 'submit':
+                return self.p4_changelist.submit()
+        return True
+
+
 def sc_check_blend(silent_mode=False):
     """
     Checks out the currently opened scene. Depending on solution, will redirect
@@ -72,7 +127,11 @@ def sc_check_blend(silent_mode=False):
 
             # NEW METHOD KEEPING OLD BEHAVIOR
             blend_p4_file = p4Wrapper.BlendP4File(client_file=blend_file_path)
-            blend_p4_file.open_blend_for_edit(silent_mode)
+            result = blend_p4_file.open_blend_for_edit(silent_mode)
+            if result:
+                _set_blend_status(blend_p4_file)  # Status is now known, next save won't need to check again
+            else:
+                _clear_blend_status()
 
             # # NEW METHOD GENERIC
             # p4_file_grp_cls = p4Wrapper.P4FileGroup()
@@ -80,6 +139,7 @@ def sc_check_blend(silent_mode=False):
             # result = p4_file_grp_cls.open_for_edit()
             # return result
             # --------------------------------------------------------------------------------
+            return result
 
         elif prefs().sc.source_control_solution == 'plastic-scm':
             return True  # By default, there is nothing to do for plastic SCM to do its job
@@ -101,3 +161,159 @@ def sc_dialog_box_info():
             return False  # TODO: Source Control - Git integration
     else:
         p4Wrapper.source_control_disabled_dialog()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+# BACKGROUND STATUS OF THE OPENED BLEND FILE
+# The Perforce status of the opened .blend is fetched by a worker thread (fstat only, no bpy access) and handed back
+# to the main thread through a bpy.app.timers poll. Saving can then skip Perforce entirely when the file is known to be
+# opened for edit already.
+
+_blend_status: Optional[p4Wrapper.BlendP4File] = None
+_blend_status_time: float = 0.0
+_blend_status_queue: queue.Queue = queue.Queue()
+_blend_status_worker: Optional[threading.Thread] = None
+_blend_status_check_on_result: bool = False
+
+
+def _set_blend_status(blend_p4_file: p4Wrapper.BlendP4File):
+    global _blend_status, _blend_status_time
+    _blend_status = blend_p4_file
+    _blend_status_time = time.monotonic()
+
+
+def _clear_blend_status():
+    global _blend_status
+    _blend_status = None
+
+
+def is_blend_status_opened_for_edit(blend_file_path: str) -> bool:
+    """
+    Returns True if the background-fetched status (not older than blend_status_max_age) says the .blend is already
+    checked out by me or marked for add.
+    """
+    if _blend_status is None or _blend_status.clientFile is None:
+        return False
+    if time.monotonic() - _blend_status_time > blend_status_max_age:
+        return False
+    if p4Wrapper.normalize_path_key(_blend_status.clientFile) != p4Wrapper.normalize_path_key(blend_file_path):
+        return False
+    return _blend_status.status in [p4Wrapper.P4FileStatus.CHECKOUT_BY_ME, p4Wrapper.P4FileStatus.MARKED_FOR_ADD]
+
+
+def sc_refresh_blend_status(check_on_result: bool = False) -> bool:
+    """
+    Fetch the Perforce status of the opened .blend in the background (main thread is not blocked).
+    :param check_on_result: Once the status is known, run sc_check_blend if the .blend isn't opened for edit yet
+                            (prompts to get latest, checkout, etc.)
+    :return: True if a fetch was started (or one is already running)
+    """
+    global _blend_status_worker, _blend_status_check_on_result
+
+    blend_file_path = blenderFile.get_blend_file_path()
+    if len(blend_file_path) == 0:
+        return False
+    if not filterUtils.filter_source_control() or prefs().sc.source_control_solution != 'perforce':
+        return False
+
+    _blend_status_check_on_result = _blend_status_check_on_result or check_on_result
+    if _blend_status_worker is not None:
+        return True  # Already fetching, result will be used
+
+    # Resolve everything that needs bpy (preferences) on the main thread, before spreading to the worker
+    p4Wrapper.update_p4_env_settings()
+    p4Wrapper.get_p4_session().get_p4_path()
+
+    _blend_status_worker = threading.Thread(target=_fetch_blend_status, args=(blend_file_path,), daemon=True)
+    _blend_status_worker.start()
+    if not bpy.app.timers.is_registered(_poll_blend_status):
+        bpy.app.timers.register(_poll_blend_status, first_interval=0.1, persistent=True)
+    return True
+
+
+def _fetch_blend_status(blend_file_path: str):
+    """
+    Worker thread: fstat the .blend and queue the result (or error) for the main thread. Something is always queued,
+    else the main thread would keep polling and no other fetch could start.
+    """
+    f_stat_dict = None
+    error = None
+    try:
+        f_stat_dict_lst = p4Wrapper.p4_fstat_dict(blend_file_path, silent_mode=True, use_cache=False)  # Fresh status
+        if f_stat_dict_lst:
+            f_stat_dict = f_stat_dict_lst[0]
+    except Exception as e:
+        error = repr(e)
+    finally:
+        _blend_status_queue.put((blend_file_path, f_stat_dict, error))
+
+
+def _poll_blend_status() -> Optional[float]:
+    """
+    Timer (main thread): pick up the worker's result and store it.
+    """
+    global _blend_status_worker, _blend_status_check_on_result
+
+    try:
+        blend_file_path, f_stat_dict, error = _blend_status_queue.get_nowait()
+    except queue.Empty:
+        return 0.1  # Poll again
+
+    _blend_status_worker = None
+    check_on_result = _blend_status_check_on_result
+    _blend_status_check_on_result = False
+
+    # Opened scene may have changed while fetching
+    if blend_file_path != blenderFile.get_blend_file_path():
+        _clear_blend_status()
+        sc_refresh_blend_status(check_on_result)
+        return None
+
+    if error is not None:
+        log(Severity.WARNING, tool_name, f'Could not fetch status of "{blend_file_path}" in the background: {error}')
+        _clear_blend_status()
+    elif f_stat_dict is None:
+        log(Severity.DEBUG, tool_name, f'Could not fetch status of "{blend_file_path}" in the background.')
+        _clear_blend_status()
+    else:
+        blend_p4_file = p4Wrapper.BlendP4File(client_file=blend_file_path)
+        blend_p4_file.update_fields(f_stat_dict)
+        _set_blend_status(blend_p4_file)
+        log(Severity.DEBUG, tool_name, f'Background status of "{blend_file_path}": {blend_p4_file.status}')
+
+    if check_on_result and not is_blend_status_opened_for_edit(blend_file_path):
+        sc_check_blend(silent_mode=False)  # Checks status with perforce and prompt to get latest, checkout, etc.
+
+    # Keep status fresh
+    if not bpy.app.timers.is_registered(_refresh_blend_status_timer):
+        bpy.app.timers.register(_refresh_blend_status_timer,
+                                first_interval=blend_status_refresh_interval,
+                                persistent=True)
+    return None
+
+
+def _refresh_blend_status_timer() -> None:
+    sc_refresh_blend_status()
+    return None
+
+
+def sc_check_blend_on_save():
+    """
+    Checks out the currently opened scene before saving, unless the background status already says it's opened for
+    edit (then there is nothing to ask the server).
+    """
+    blend_file_path = blenderFile.get_blend_file_path()
+    if is_blend_status_opened_for_edit(blend_file_path):
+        log(Severity.DEBUG, tool_name, f'"{blend_file_path}" is already opened for edit, skipping checkout.')
+        return True
+    return sc_check_blend(silent_mode=False)
+
+
+def sc_stop_blend_status_refresh():
+    """
+    Unregister background status timers (worker thread is a daemon and its result is dropped).
+    """
+    for timer in (_poll_blend_status, _refresh_blend_status_timer):
+        if bpy.app.timers.is_registered(timer):
+            bpy.app.timers.unregister(timer)
+    _clear_blend_status()
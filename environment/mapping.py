@@ -85,4 +85,6 @@ source_control_setting_lst = (
     Setting(pref_path='sourcecontrol.win32_env_override', ini_section='Perforce', ini_value='override_env_setting', var_type=bool),
     Setting(pref_path='sourcecontrol.p4v_app_path_mac', ini_section='Perforce', ini_value='p4v_app_path_mac', var_type=str),
     Setting(pref_path='sourcecontrol.p4_parallel_path_linux', ini_section='Perforce', ini_value='p4_parallel_path_linux', var_type=str),
+    Setting(pref_path='sourcecontrol.p4_export_changelist_enable', ini_section='Perforce', ini_value='export_changelist_enable', var_type=bool),
+    Setting(pref_path='sourcecontrol.p4_export_changelist_action', ini_section='Perforce', ini_value='export_changelist_action', var_type=str),
 )
@@ -491,6 +491,22 @@ class _SCPrefs:
     def p4_parallel_path_linux(self, value: str):
         self._sc.p4_parallel_path_linux = value
 
+    @property
+    def p4_export_changelist_enable(self) -> bool:
+        return self._sc.p4_export_changelist_enable
+
+    @p4_export_changelist_enable.setter
+    def p4_export_changelist_enable(self, value: bool):
+        self._sc.p4_export_changelist_enable = value
+
+    @property
+    def p4_export_changelist_action(self) -> str:
+        return self._sc.p4_export_changelist_action
+
+    @p4_export_changelist_action.setter
+    def p4_export_changelist_action(self, value: str):
+        self._sc.p4_export_changelist_action = value
+
 
 class _HelpNUpdatePrefs:
     def __init__(self, help_n_update):
@@ -119,6 +119,21 @@ class SourceControlPG(bpy.types.PropertyGroup):
                                            description='The path to the "p4_parallel" file, which is the executable on Linux used to make calls to the Perforce server. It is located within the Perforce installation.',
                                            default='DEFAULT_STR')
 
+    # ------------------------------------------------------------------------------------------------------------------
+    # EXPORT CHANGELIST
+    p4_export_changelist_enable: BoolProperty(name='Export to Own Changelist',
+                                              description='Open exported files in a pending changelist of their own '
+                                                          '(one per .blend), instead of the default changelist',
+                                              default=False)
+
+    p4_export_changelist_action_lst = [('none', 'Leave Pending', 'Leave the export changelist pending'),
+                                       ('shelve', 'Shelve', 'Shelve the export changelist once exported'),
+                                       ('submit', 'Submit', 'Submit the export changelist once exported')]
+    p4_export_changelist_action: EnumProperty(name='Once Exported',
+                                              description='What to do with the export changelist once exported',
+                                              items=p4_export_changelist_action_lst,
+                                              default='none')
+
 
 
 def label_row(path, prop, row, label=''):
@@ -201,3 +216,10 @@ def draw(preference, context, layout):
                 row = column.row()
                 row.enabled = enable_rows
                 row.prop(preference.sourcecontrol, p4_parallel_str, text=p4_parallel_name)
+
+            # Export changelist
+            row = column.row()
+            row.enabled = enable_rows
+            row.prop(preference.sourcecontrol, 'p4_export_changelist_enable', text='Export to Own Changelist')
+            if prefs().sc.p4_export_changelist_enable:
+                row.prop(preference.sourcecontrol, 'p4_export_changelist_action', text='Once Exported')
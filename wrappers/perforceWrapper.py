@@ -12,7 +12,16 @@ __status__ = 'Production'
 # IMPORTS
 
 # System
+import atexit
+import concurrent.futures
 import enum
+import io
+import json
+import marshal
+import re
+import tempfile
+import threading
+import time
 from typing import *
 from pathlib import Path
 
@@ -20,7 +29,8 @@ from pathlib import Path
 import bpy
 
 # Blue Hole
-from ..blenderUtils import filterUtils
+from ..blenderUtils import filterUtils, blenderFile
+from ..environment import envPathResolver
 from ..Lib.commonUtils.debugUtils import *
 from ..preferences.prefs import *
 from ..Lib.commonUtils.wrappers import cmdShellWrapper
@@ -31,6 +41,11 @@ from ..Lib.commonUtils.osUtils import *
 # USER DEFINED VARIABLES
 tool_name = 'Blue Hole [Perforce Wrapper]'
 show_verbose = True
+p4_batch_time_out = 120  # Seconds a batched p4 call (one command type, all of its files) may go without output
+p4_info_ttl = 300  # Seconds a successful "p4 info" is reused before being fetched again (see get_p4_info)
+p4_fstat_cache_max_age = 600  # Seconds a cached fstat record is trusted for, if nothing changed locally (see P4FstatCache)
+p4_fstat_shard_size = 500  # Files per fstat call. Larger requests are split in shards, fetched in parallel.
+p4_fstat_max_concurrency = 4  # Max fstat calls running at once, so the server isn't hammered
 
 
 # ----------------------------------------------------------------------------------------------------------------------
@@ -39,7 +54,7 @@ show_verbose = True
 
 class P4Info:
     """
-    Stores the info from the p4 info command in strings.
+    Stores the info from the p4 info command in strings. Use get_p4_info to get the session's cached instance.
     """
 
     def __init__(self):
@@ -64,9 +79,6 @@ class P4Info:
         self.server_license_ip = ''
         self.case_handling = ''
 
-        # Set p4 env settings
-        set_p4_env_settings()  # Sets P4 Environment Settings so they are set for later use. Don't know if I need this anywhere else.
-
         # Update keys
         self.update_fields()
 
@@ -158,6 +170,11 @@ class P4FileStatus(enum.Enum):
 
 
 class P4File:
+    # Fixed attributes (no per-instance __dict__), as groups can track thousands of files
+    __slots__ = ('depotFile', 'clientFile', 'status', 'file_name', 'isMapped', 'notInClientView', 'headAction',
+                 'headType', 'headTime', 'headRev', 'headChange', 'headModTime', 'haveRev', 'otherOpen0',
+                 'otherAction0', 'otherChange0', 'otherOpen', 'action', 'change', 'type', 'actionOwner', 'workRev')
+
     def __init__(self, client_file: Union[str, None] = None, depot_file: Union[str, None] = None):
         # Set fields (if they were given, else is None
         self.depotFile: Union[str, None] = depot_file
@@ -191,14 +208,15 @@ class P4File:
     def update_fields(self, f_stat_dict=None) -> bool:
         # If no dict is given for the refresh, fetch info.
         if f_stat_dict is None:
-            f_stat_dict = p4_fstat_dict(self.clientFile)
-            if f_stat_dict is not None:
+            f_stat_dict = p4_fstat_dict(self.get_display_name())
+            if f_stat_dict:
                 f_stat_dict = f_stat_dict[0]  # There was no error, get the first (only) item to process.
             else:
                 return False  # There was an error, return False as could not process properly.
 
-        self.depotFile = self.key_else_default(f_stat_dict, 'depotFile')
-        self.clientFile = self.key_else_default(f_stat_dict, 'clientFile')
+        # Error results (no such file, not in client view) only have the path they were asked with, keep the other one
+        self.depotFile = self.key_else_default(f_stat_dict, 'depotFile', self.depotFile)
+        self.clientFile = self.key_else_default(f_stat_dict, 'clientFile', self.clientFile)
         self.headAction = self.key_else_default(f_stat_dict, 'headAction')
         self.headType = self.key_else_default(f_stat_dict, 'headType')
         self.headTime = self.key_else_default(f_stat_dict, 'headTime')
@@ -216,7 +234,8 @@ class P4File:
         self.actionOwner = self.key_else_default(f_stat_dict, 'actionOwner')
         self.workRev = self.key_else_default(f_stat_dict, 'workRev')
 
-        self.file_name = self.clientFile.split('\\')[-1]
+        # Depot-only files (not in client) have no clientFile, name them from their depotFile then
+        self.file_name = self.get_display_name().replace('\\', '/').split('/')[-1]
 
         # Give label on if it's mapped or not
         if 'isMapped' in f_stat_dict.keys():
@@ -370,7 +389,7 @@ class P4File:
 
         # Run command for p4_file
         display_name = self.get_display_name()
-        exec_p4_command(f'{command} {display_name}')
+        get_p4_session().run(command, [display_name])
     
     def _run_p4_add(self):
         self._callback_pre_add()
@@ -416,7 +435,7 @@ class P4File:
         log(Severity.WARNING, tool_name, msg)
 
         # Perforce Server accessible Check
-        p4_info_cls = P4Info()
+        p4_info_cls = get_p4_info()
         if not p4_info_cls.is_server_accessible(silent):
             return False
         elif not self.is_client_file_under_workspace_root(p4_info_cls, silent=True):
@@ -491,6 +510,8 @@ class P4File:
 
 class BlendP4File(P4File):
     # TODO: Handle sync (exit > sync > reload scene)
+    __slots__ = ()
+
     def __init__(self, client_file: Union[str, None] = None, depot_file: Union[str, None] = None):
         if client_file is None:
             log(Severity.CRITICAL, tool_name, 'BlendP4File: Input client_file is Invalid! Received None.')
@@ -510,7 +531,7 @@ class BlendP4File(P4File):
         if not check_result:
             return False
 
-        super().open_for_edit(silent=silent)
+        return super().open_for_edit(silent=silent)
 
     def _callback_post_sync(self):
         bpy.ops.wm.open_mainfile(filepath=self.clientFile)
@@ -523,6 +544,13 @@ class P4FileGroup:
 
     def __init__(self):
         self.__p4_file_lst: List[P4File] = []
+        # Indexes of P4Files by path (as given, then normalized with normalize_path_key), to match fstat results
+        self.__client_file_index: Tuple[Dict[str, P4File], Dict[str, P4File]] = ({}, {})
+        self.__depot_file_index: Tuple[Dict[str, P4File], Dict[str, P4File]] = ({}, {})
+        # Index sets of P4Files by status (None until fetched) & of those not in client view. Dicts are used as
+        # ordered sets, so results keep a deterministic order.
+        self.__status_index: Dict[Optional[P4FileStatus], Dict[P4File, None]] = {}
+        self.__not_in_client_view_index: Dict[P4File, None] = {}
 
     def get_p4_file_lst(self) -> List[P4File]:
         return self.__p4_file_lst
@@ -530,158 +558,172 @@ class P4FileGroup:
     def append_p4_file_to_group_from_client_file(self, client_file):
         p4_file = P4File(client_file=client_file)
         self.__p4_file_lst.append(p4_file)
+        self.__index_p4_file(p4_file)
 
     def append_p4_file_to_group_from_depot_file(self, depot_file):
         p4_file = P4File(depot_file=depot_file)
         self.__p4_file_lst.append(p4_file)
+        self.__index_p4_file(p4_file)
+
+    def __index_p4_file(self, p4_file: P4File):
+        """
+        Add P4File's current clientFile & depotFile to the indexes (previous entries are kept, as they still point to
+        the same file), and move it to the index set of its current status.
+        """
+        for path, index in ((p4_file.clientFile, self.__client_file_index),
+                            (p4_file.depotFile, self.__depot_file_index)):
+            if path is not None:
+                index[0].setdefault(path, p4_file)
+                index[1].setdefault(normalize_path_key(path), p4_file)
+
+        for status_set in self.__status_index.values():
+            status_set.pop(p4_file, None)
+        self.__status_index.setdefault(p4_file.status, {})[p4_file] = None
+        if p4_file.notInClientView:
+            self.__not_in_client_view_index[p4_file] = None
+        else:
+            self.__not_in_client_view_index.pop(p4_file, None)
 
-    def get_p4_file_with_client_file_dict(self) -> Dict[str, P4File]:
+    def get_p4_file_lst_by_status(self, status_lst: List[Optional[P4FileStatus]]) -> List[P4File]:
+        """
+        Returns the P4Files of the group having one of the statuses (from the status index sets, no scan of the group)
+        """
+        return [p4_file for status in status_lst for p4_file in self.__status_index.get(status, {})]
+
+    def get_p4_file_lst_excluding_status(self, status_lst: List[Optional[P4FileStatus]]) -> List[P4File]:
+        """
+        Returns the P4Files of the group having none of the statuses
+        """
+        return [p4_file for status, status_set in self.__status_index.items() if status not in status_lst
+                for p4_file in status_set]
+
+    def get_p4_file_with_client_file_dict(self, p4_file_lst: Optional[List[P4File]] = None) -> Dict[str, P4File]:
+        """
+        :param p4_file_lst: Subset of the group to look into (whole group if None)
+        """
         p4_file_dict = {}
-        for p4_file in self.__p4_file_lst:
+        for p4_file in self.__p4_file_lst if p4_file_lst is None else p4_file_lst:
             if p4_file.clientFile is not None:
                 p4_file_dict[p4_file.clientFile] = p4_file
         return p4_file_dict
 
-    def get_p4_file_with_depot_file_and_no_client_file(self):
-        p4_file_with_client_file_dict = self.get_p4_file_with_client_file_dict()
+    def get_p4_file_with_depot_file_and_no_client_file(self, p4_file_lst: Optional[List[P4File]] = None):
+        """
+        :param p4_file_lst: Subset of the group to look into (whole group if None)
+        """
+        p4_file_lst = self.__p4_file_lst if p4_file_lst is None else p4_file_lst
         p4_file_dict = {}
-        for p4_file in self.__p4_file_lst:
-            if p4_file not in p4_file_with_client_file_dict.values():
+        for p4_file in p4_file_lst:
+            if p4_file.clientFile is None:
                 if p4_file.depotFile is not None:
                     p4_file_dict[p4_file.depotFile] = p4_file
                 else:
                     P4CriticalMessage().p4_file_client_or_depot_path_required(group=True)
         return p4_file_dict
 
-    def update_fields_client_n_depot(self):
+    def update_fields_client_n_depot(self, p4_file_lst: Optional[List[P4File]] = None):
         """
-        Create dictionary of clientFile & depotFile and update fields and match.
+        Batch operation. Updates the fields of every P4File of the group with a single fstat call. P4Files with a
+        clientFile are queried (and matched back) with it, others with their depotFile.
+        :param p4_file_lst: Subset of the group to update (whole group if None)
         """
+        client_file_p4_file_dict = self.get_p4_file_with_client_file_dict(p4_file_lst)
+        depot_file_p4_file_dict = self.get_p4_file_with_depot_file_and_no_client_file(p4_file_lst)
+        file_path_lst = list(client_file_p4_file_dict.keys()) + list(depot_file_p4_file_dict.keys())
 
-        # Update fields for Dict [clientFile (str), P4File]
-        client_file_p4_file_dict = self.get_p4_file_with_client_file_dict()
-        if not self.update_fields_by_matching_key('clientFile', client_file_p4_file_dict):
-            return False
+        # Nothing to update
+        if len(file_path_lst) == 0:
+            return True
 
-        # Update fields for Dict [depotFile (str), P4File]
-        depot_file_p4_file_dict = self.get_p4_file_with_depot_file_and_no_client_file()
-        if not self.update_fields_by_matching_key('depotFile', depot_file_p4_file_dict):
-            return False
+        # Inquire and get results as a lst of dicts
+        log(Severity.DEBUG, tool_name, f'Issuing fstat call for {len(file_path_lst)} file(s)')
+        result_dicts_lst = p4_fstat_dict(file_path_lst)
+        if not result_dicts_lst:
+            return False  # There was an error fetching the dict
 
-        # Completed
-        return True
+        for result_dict in result_dicts_lst:
+            match_p4_file = self.get_p4_file_by_matching_key('clientFile', result_dict)
+            if match_p4_file is None:
+                match_p4_file = self.get_p4_file_by_matching_key('depotFile', result_dict)
+
+            if match_p4_file is not None:
+                match_p4_file.update_fields(result_dict)
+                self.__index_p4_file(match_p4_file)  # Paths may have been filled (or their case fixed) by fstat
+            else:
+                result_name = result_dict.get('clientFile', result_dict.get('depotFile'))
+                msg = f'Could not match fstat result {result_name} to a P4File!'
+                log(Severity.ERROR, tool_name, msg)
+                return False
 
-    def update_fields_by_matching_key(self, fstat_key: str, p4_file_dict: Dict[str, P4File]):
+        return True  # Worked properly for all
+
+    def get_p4_file_by_matching_key(self, fstat_key: str, result_dict: Dict[str, str]) -> Optional[P4File]:
         """
-        Batch operation. Updates the fields of a dictionary of P4 Files, where the key is either clientFile or
-        depotFile. A fstat_key parameter is given, saying what's the key (clientFile or depotFile)
+        Returns the P4File of the group a fstat result belongs to (else None). A fstat_key parameter is given, saying
+        which key to match with (clientFile or depotFile).
         """
         if fstat_key not in ['depotFile', 'clientFile']:
-            log(Severity.CRITICAL, tool_name, 'Update fields by matching key: fstat_key is invalid')
-            return False
-
-        file_path_string_lst = self.append_lst_to_string_max_length(p4_file_dict.keys(), ' ', 1000, quotation_marks=True)
-        call_counter = 0
-        for file_path_string in file_path_string_lst:
-            # Print number of call executed, to give progress feedback...
-            call_counter += 1
-            log(Severity.DEBUG, tool_name, f'Issuing Call (from {fstat_key}) # {call_counter} of {len(file_path_string_lst)}')
-
-            # Inquire and get results as a lst of dicts
-            result_dicts_lst = p4_fstat_dict(file_path_string)
-            if not result_dicts_lst:
-                return False  # There was an error fetching the dict
-
-            for result_dict in result_dicts_lst:
-                result_match_key = result_dict[fstat_key]
-                match_p4_file: Optional[P4File] = None
-
-                # If on Windows and cannot find key, attempt by ignoring case. Other platform YOLO it that way too.
-                if result_match_key not in p4_file_dict.keys():
-                    result_match_key_lower = result_match_key.lower()
-                    for original_key in p4_file_dict.keys():
-                        original_key_lower = original_key.lower()
-                        if original_key_lower == result_match_key_lower:
-                            match_p4_file = p4_file_dict[original_key]
-                            break
-                else:
-                    match_p4_file = p4_file_dict[result_match_key]
+            log(Severity.CRITICAL, tool_name, 'Get P4File by matching key: fstat_key is invalid')
+            return None
 
-                if match_p4_file is not None:
-                    match_p4_file.update_fields(result_dict)
-                else:
-                    msg = f'Could not match key {fstat_key} {result_match_key} to a P4File!'
-                    log(Severity.ERROR, tool_name, msg)
-                    return False
+        result_match_key = result_dict.get(fstat_key)
+        if result_match_key is None:
+            return None
 
-        return True  # Worked properly for all
+        # If cannot find key as is, attempt by ignoring case & separators (Windows). Other platform YOLO it that way too.
+        index = self.__client_file_index if fstat_key == 'clientFile' else self.__depot_file_index
+        match_p4_file = index[0].get(result_match_key)
+        if match_p4_file is None:
+            match_p4_file = index[1].get(normalize_path_key(result_match_key))
+        return match_p4_file
 
     def force_get_latest(self):
-        self.__run_p4_cmd_on_p4_file_lst(command='p4 sync -f')
-
-    def __run_p4_cmd_on_p4_file_lst(self, command: str,
-                                    incl_status_lst: Union[List[P4FileStatus], None] = None,
-                                    excl_status_lst: Union[List[P4FileStatus], None] = None):
-        # Run command for p4_file with clientFile
-        file_path_with_client_file_dict = self.get_p4_file_with_client_file_dict()
-        # Filter
-        filtered_file_path_with_client_file_dict = {}
-        for key, p4_file in file_path_with_client_file_dict.items():
-            include = True
-            if incl_status_lst is not None:
-                if p4_file.status not in incl_status_lst:
-                    include = False
-            if excl_status_lst is not None:
-                if p4_file.status in excl_status_lst:
-                    include = False
-            if include:
-                filtered_file_path_with_client_file_dict[key] = p4_file
-        # If command is to add a file, and it's not present on disk already, a dummy file must be created. This only applies to clientFile (disk path), not depotPath (server path)
-        if 'p4 add' in command:
-            for p4_file in filtered_file_path_with_client_file_dict.values():
-                if not os.path.isfile(p4_file.clientFile):
-                    create_empty_file(p4_file.clientFile)
-        # Create string
-        file_path_string_lst = self.append_lst_to_string_max_length(filtered_file_path_with_client_file_dict.keys(), ' ', 1000, quotation_marks=True)
-        call_counter = 0
-        for file_path_string in file_path_string_lst:
-            # Print number of call executed, to give progress feedback...
-            call_counter += 1
-            log(Severity.DEBUG, tool_name,
-                'Issuing Call (from clientFile) #' + str(call_counter) + ' of ' + str(len(file_path_string_lst)))
-            exec_p4_command(f'{command} {file_path_string}')
-
-        # Run command for p4_file with depotFile (and no clientFile)
-        file_path_with_depot_file_dict = self.get_p4_file_with_depot_file_and_no_client_file()
-        # Filter
-        filtered_file_path_with_depot_file_dict = {}
-        for key, p4_file in file_path_with_depot_file_dict.items():
-            include = True
-            if incl_status_lst is not None:
-                if p4_file.status not in incl_status_lst:
-                    include = False
-            if excl_status_lst is not None:
-                if p4_file.status in excl_status_lst:
-                    include = False
-            if include:
-                filtered_file_path_with_depot_file_dict[key] = p4_file
-        # Create string
-        file_path_string_lst = self.append_lst_to_string_max_length(filtered_file_path_with_depot_file_dict.keys(), ' ', 1000, quotation_marks=True)
-        call_counter = 0
-        for file_path_string in file_path_string_lst:
-            # Print number of call executed, to give progress feedback...
-            call_counter += 1
-            log(Severity.DEBUG, tool_name,
-                'Issuing Call (from depotFile) #' + str(call_counter) + ' of ' + str(len(file_path_string_lst)))
-            exec_p4_command(f'{command} {file_path_string}')
-
-    def open_for_edit(self):
+        self.__queue_p4_cmd_on_p4_file_lst(command='p4 sync -f')
+        get_p4_session().flush()
+
+    def __queue_p4_cmd_on_p4_file_lst(self, command: str,
+                                      incl_status_lst: Union[List[P4FileStatus], None] = None,
+                                      excl_status_lst: Union[List[P4FileStatus], None] = None):
+        """
+        Queue command in the P4Session for every P4File of the group matching the status filters. Nothing is sent to
+        the server until the session is flushed.
+        """
+        p4_session = get_p4_session()
+
+        # Filter (from the status index sets)
+        if incl_status_lst is not None:
+            p4_file_lst = self.get_p4_file_lst_by_status(incl_status_lst)
+        else:
+            p4_file_lst = self.__p4_file_lst
+        if excl_status_lst is not None:
+            excl_p4_file_set = set(self.get_p4_file_lst_by_status(excl_status_lst))
+            p4_file_lst = [p4_file for p4_file in p4_file_lst if p4_file not in excl_p4_file_set]
+
+        # Files with clientFile are sent with clientFile, others with depotFile
+        file_path_with_client_file_dict = self.get_p4_file_with_client_file_dict(p4_file_lst)
+        file_path_with_depot_file_dict = self.get_p4_file_with_depot_file_and_no_client_file(p4_file_lst)
+        for from_key, file_path_dict in (('clientFile', file_path_with_client_file_dict),
+                                         ('depotFile', file_path_with_depot_file_dict)):
+            queued_counter = 0
+            for file_path, p4_file in file_path_dict.items():
+                # If command is to add a file, and it's not present on disk already, a dummy file must be created.
+                # This only applies to clientFile (disk path), not depotPath (server path)
+                if 'p4 add' in command and from_key == 'clientFile' and not os.path.isfile(file_path):
+                    create_empty_file(file_path)
+                p4_session.queue(command, file_path)
+                queued_counter += 1
+            if queued_counter:
+                log(Severity.DEBUG, tool_name, f'Queued "{command}" (from {from_key}) for {queued_counter} file(s)')
+
+    def open_for_edit(self, changelist: Optional['P4Changelist'] = None):
         """
         Accurate method of opening files for edit (Get latest if needed, only checks out if not checked out yet, warning if someone else has the file, etc.)
+        :param changelist: Numbered pending changelist to open the files in (default changelist if None). Files that are
+                           already opened elsewhere are moved to it.
         """
 
         # Check Perforce server is accessible
-        p4_info_cls = P4Info()
+        p4_info_cls = get_p4_info()
         if not p4_info_cls.is_server_accessible():
             return False
         if not self.is_client_file_under_workspace_root(p4_info_cls):
@@ -700,23 +742,54 @@ class P4FileGroup:
         if not self.is_not_marked_for_delete():
             return False
 
+        # Deduce the action(s) needed for each file from the fstat above
+        opened_status_lst = [P4FileStatus.MARKED_FOR_ADD, P4FileStatus.CHECKOUT_BY_ME]
         # Mark not added for add
-        self.__run_p4_cmd_on_p4_file_lst(command='p4 add', incl_status_lst=[P4FileStatus.NOT_ADDED])
-
-        # Get latest on files that are not at latest
-        self.__run_p4_cmd_on_p4_file_lst(command='p4 sync -f', incl_status_lst=[P4FileStatus.NOT_LATEST_REVISION])
-
-        # Checkout files that re not checked out yet
-        self.__run_p4_cmd_on_p4_file_lst(command='p4 edit',
-                                         excl_status_lst=[P4FileStatus.NOT_ADDED,
-                                                          P4FileStatus.MARKED_FOR_ADD,
-                                                          P4FileStatus.CHECKOUT_BY_ME])
-
-        # Update fields
-        result = self.update_fields_client_n_depot()
+        add_lst: List[P4File] = self.get_p4_file_lst_by_status([P4FileStatus.NOT_ADDED])
+        # Get latest on files that are not at latest, then checkout
+        sync_lst: List[P4File] = self.get_p4_file_lst_by_status([P4FileStatus.NOT_LATEST_REVISION])
+        # Checkout files that are not checked out yet
+        edit_lst: List[P4File] = self.get_p4_file_lst_excluding_status(
+            opened_status_lst + [P4FileStatus.NOT_ADDED, P4FileStatus.NOT_LATEST_REVISION])
+        # Already opened, but in another changelist than the one requested
+        reopen_lst: List[P4File] = []
+        if changelist is not None:
+            reopen_lst = [p4_file for p4_file in self.get_p4_file_lst_by_status(opened_status_lst)
+                          if p4_file.change != str(changelist.number)]
+
+        # Files must exist on disk to be marked for add (may be created later)
+        for p4_file in add_lst:
+            if p4_file.clientFile is not None:
+                create_empty_file(p4_file.clientFile)
+
+        # Files are directly opened in the requested changelist (-c), so only the ones opened beforehand need a reopen
+        change_opt = '' if changelist is None else f' -c {changelist.number}'
+
+        # Add, edit, sync+edit and reopen never apply to the same files, so they run concurrently. Sync must precede the
+        # edit of the same files, so those share a lane.
+        sync_path_lst = [p4_file.get_display_name() for p4_file in sync_lst]
+        lane_lst = [[(f'p4 add{change_opt}', [p4_file.get_display_name() for p4_file in add_lst])],
+                    [(f'p4 edit{change_opt}', [p4_file.get_display_name() for p4_file in edit_lst])],
+                    [('p4 sync -f', sync_path_lst), (f'p4 edit{change_opt}', sync_path_lst)]]
+        if len(reopen_lst) > 0:
+            lane_lst.append([(f'p4 reopen{change_opt}', [p4_file.get_display_name() for p4_file in reopen_lst])])
+        get_p4_session().run_concurrent(lane_lst)
+
+        # Update fields, only for the files that were acted upon (others did not change)
+        changed_lst = add_lst + sync_lst + edit_lst + reopen_lst
+        if len(changed_lst) == 0:
+            return True
+        result = self.update_fields_client_n_depot(changed_lst)
         if not result:  # Fields didn't properly get set
             return False
 
+        # If not checked out or marked for add, did not succeed
+        not_opened_lst = [p4_file for p4_file in changed_lst if p4_file.status not in opened_status_lst]
+        for p4_file in not_opened_lst:
+            log(Severity.ERROR, tool_name, f'File "{p4_file.get_display_name()}" could not be successfully checked out!')
+        if len(not_opened_lst) > 0:
+            return False
+
         # If got here with no issue, completed successfully
         return True
 
@@ -735,10 +808,8 @@ class P4FileGroup:
 
     def is_in_client_view(self, p4_info_cls: P4Info) -> bool:
         # Check if not in client view
-        not_in_client_view = []
-        for p4_file in self.__p4_file_lst:
-            if not p4_file.is_in_client_view(silent=True):
-                not_in_client_view.append(p4_file)
+        not_in_client_view = [p4_file for p4_file in self.__not_in_client_view_index
+                              if not p4_file.is_in_client_view(silent=True)]
         # If at least one file was not in client view, show error dialogue and exit process
         if len(not_in_client_view) > 0:
             P4ErrorMessage().not_in_client_view_elaborate(p4_info_cls)
@@ -747,10 +818,9 @@ class P4FileGroup:
 
     def is_free_from_other_checkouts(self) -> bool:
         # Check if files are checked out by somebody else
-        p4_checked_out_others_lst = []
-        for p4_file in self.__p4_file_lst:
-            if not p4_file.is_free_from_other_checkouts():
-                p4_checked_out_others_lst.append(p4_file)
+        p4_checked_out_others_lst = [p4_file
+                                     for p4_file in self.get_p4_file_lst_by_status([P4FileStatus.CHECKOUT_BY_OTHER])
+                                     if not p4_file.is_free_from_other_checkouts()]
         # If at least one file was checked out by others, display error message.
         if len(p4_checked_out_others_lst) > 0:
             P4ErrorMessage().not_free_from_other_checkouts_elaborate()
@@ -759,99 +829,387 @@ class P4FileGroup:
 
     def is_not_marked_for_delete(self):
         # Check if files are marked for delete elsewhere
-        p4_marked_delete_lst = []
-        for p4_file in self.__p4_file_lst:
-            if not p4_file.is_not_marked_for_delete():
-                p4_marked_delete_lst.append(p4_file)
+        p4_marked_delete_lst = [p4_file
+                                for p4_file in self.get_p4_file_lst_by_status([P4FileStatus.MARKED_FOR_DELETE])
+                                if not p4_file.is_not_marked_for_delete()]
         # If at least one file was marked for delete elsewhere, display error message.
         if len(p4_marked_delete_lst) > 0:
             P4ErrorMessage().marked_for_delete_elaborate()
             return False  # Did not run as intended.
         return True
 
-    def append_lst_to_string_max_length(self, lst, split_str, max_str_length, quotation_marks=False):
-        """
-        Append elements of a list to a string (if the result is less than specific string maximum length). When limit is
-        to be reached, append to a second string and so on, so forth.
-        :param lst: List of elements to append to the string(s)
-        :type lst: lst
-        :param split_str: Segment to put in-between appends
-        :type split_str: str
-        :param max_str_length: Maximum character length allowed for a string
-        :type max_str_length: int
-        :param quotation_marks: When true, puts quotation marks at start/end of each element in list
-        :type quotation_marks: bool
-        """
-        # Create strings of limited length
-        file_str_lst = []
-        file_str = ''
-        for item in lst:
-            if quotation_marks:
-                item = '"' + item + '"'
-            if len(file_str) + len(item) + len(split_str) > max_str_length:  # If longer than max length
-                file_str_lst.append(file_str)  # Append string to list of strings to execute
-                file_str = ''  # Reset string
-            file_str += item + split_str
-
-        # Add what is left in file_str to file_str_lst
-        if file_str != '':
-            file_str_lst.append(file_str)
-
-        # Remove the in-between at the end of each string of the array.
-        file_str_lst_final = []
-        for string in file_str_lst:
-            file_str_lst_final.append(string[:-len(split_str)])
-
-        # Return array of strings
-        return file_str_lst
-
-
-def p4_fstat_dict(file_path_string, silent_mode=False) -> Optional[List[Dict[str, str]]]:
+
+class P4Changelist:
     """
-    Get p4 fstat results, cleaned as an array of dicts (1 dict per item)
+    Numbered pending changelist, so the files of a batch (ex. an export) are opened together instead of being scattered
+    in the default changelist. Once the batch is done, it can be shelved or submitted as a whole.
     """
 
-    # If file_path isn't enclosed in quotation marks, enclose.
-    if '"' not in file_path_string[0]:
-        file_path_string = '"' + file_path_string + '"'
+    def __init__(self, description: str, number: Optional[int] = None):
+        self.description: str = description
+        self.number: Optional[int] = number
 
-    # Get status of files
-    result_array = exec_p4_command("p4 fstat {}".format(file_path_string))
+    def open_or_create(self) -> bool:
+        """
+        Use the client's pending changelist with the same description (if there is one), else create a new one.
+        :return: True if the changelist is ready to receive files
+        """
+        p4_info_cls = get_p4_info()
+        if not p4_info_cls.is_server_accessible():
+            return False
 
-    result_dicts_lst = []
-    result_dict = {}
-
-    # Transform status of files in easily understood dict
-    for i in result_array:
-        if 'Your session has expired, please login again' in i:
-            if not silent_mode:
-                msg = 'Your session has expired. Please login again from Perforce. Aborting!'
-                log(Severity.ERROR, tool_name, msg, popup=True)
+        # Reuse pending changelist with the same description
+        for record in get_p4_session().run_marshal(f'p4 changes -s pending -l -c {p4_info_cls.client_name}'):
+            if record.get('code') == 'error':
+                log(Severity.ERROR, tool_name, P4Error(record).message)
+                return False
+            if record.get('desc', '').strip() == self.description.strip():
+                self.number = int(record['change'])
+                log(Severity.DEBUG, tool_name, f'Using pending changelist {self.number} ("{self.description}")')
+                return True
+
+        # Create it (form sent on stdin)
+        description = '\n'.join(f'\t{line}' for line in self.description.splitlines())
+        form = (f'Change: new\n'
+                f'Client: {p4_info_cls.client_name}\n'
+                f'User: {p4_info_cls.user_name}\n'
+                f'Status: new\n'
+                f'Description:\n{description}\n')
+        output_lst = get_p4_session().run('p4 change -i', input_str=form)
+        for line in output_lst:
+            match = re.match(r'Change (\d+) created', line)
+            if match is not None:
+                self.number = int(match.group(1))
+                log(Severity.INFO, tool_name, f'Created pending changelist {self.number} ("{self.description}")')
+                return True
+
+        log(Severity.ERROR, tool_name, f'Could not create pending changelist: {" ".join(output_lst)}')
+        return False
+
+    def reopen(self, file_path_lst: List[str]) -> bool:
+        """
+        Move files that are already opened into this changelist (a single p4 call)
+        """
+        record_lst = get_p4_session().run_marshal(f'p4 reopen -c {self.number}', file_path_lst)
+        return self.__is_output_without_error(record_lst, 'reopen')
+
+    def shelve(self) -> bool:
+        """
+        Shelve the changelist's files, replacing what was previously shelved in it
+        """
+        record_lst = get_p4_session().run_marshal(f'p4 shelve -r -c {self.number}')
+        return self.__is_output_without_error(record_lst, 'shelve')
+
+    def submit(self) -> bool:
+        """
+        Submit the changelist (atomic: either all of its files are submitted, or none)
+        """
+        record_lst = get_p4_session().run_marshal(f'p4 submit -c {self.number}')
+        if not self.__is_output_without_error(record_lst, 'submit'):
+            return False
+        if not any('submittedChange' in record for record in record_lst):
+            log(Severity.ERROR, tool_name, f'Could not submit changelist {self.number}: nothing was submitted')
+            return False
+        log(Severity.INFO, tool_name, f'Submitted changelist {self.number} ("{self.description}")')
+        return True
+
+    def __is_output_without_error(self, record_lst: List[Dict[str, Union[str, int]]], action: str) -> bool:
+        """
+        Errors are read from the records' code (not from their text, which may contain "error" in paths or be
+        localized). Includes warnings reported as errors, ex. file(s) not opened on this client.
+        """
+        error_lst = [P4Error(record) for record in record_lst if record.get('code') == 'error']
+        for p4_error in error_lst:
+            log(Severity.ERROR, tool_name, f'Changelist {self.number} {action}: {p4_error.message}')
+        return len(error_lst) == 0
+
+
+class P4ErrorType(enum.Enum):
+    NO_SUCH_FILE = 'No such file'
+    NOT_IN_CLIENT_VIEW = 'Not in client view'
+    SESSION_EXPIRED = 'Session expired'
+    OTHER = 'Other'
+
+
+class P4Error:
+    """
+    Error record returned by a marshalled (-G) Perforce command, with its type deduced.
+    """
+
+    def __init__(self, record: Dict[str, Union[str, int]]):
+        self.message: str = str(record.get('data', '')).rstrip('\n')
+        self.severity: Optional[int] = record.get('severity')
+        self.generic: Optional[int] = record.get('generic')
+        self.file_path: Optional[str] = None
+        self.error_type: P4ErrorType = P4ErrorType.OTHER
+
+        # Deduce error type (and the file it applies to, if any)
+        for suffix, error_type in ((' - no such file(s).', P4ErrorType.NO_SUCH_FILE),
+                                   (' - file(s) not in client view.', P4ErrorType.NOT_IN_CLIENT_VIEW)):
+            if self.message.endswith(suffix):
+                self.file_path = self.message[:-len(suffix)]
+                self.error_type = error_type
+                return
+        if self.message.startswith('Your session has expired'):
+            self.error_type = P4ErrorType.SESSION_EXPIRED
+
+    def get_file_path_key(self) -> str:
+        """
+        Returns the fstat key the file path would be under (depotFile or clientFile)
+        """
+        return 'depotFile' if self.file_path is not None and self.file_path.startswith('//') else 'clientFile'
+
+
+def normalize_path_key(path: str) -> str:
+    """
+    Returns the path casefolded and with forward slashes, so the same file written differently matches.
+    """
+    return path.replace('\\', '/').casefold()
+
+
+def decode_marshal_records(output: bytes) -> List[Dict[str, Union[str, int]]]:
+    """
+    Decode the output of a "p4 -G" command (a stream of marshalled dicts) in a single pass.
+    """
+    return list(iter_marshal_records(io.BytesIO(output)))
+
+
+def iter_marshal_records(stream: IO[bytes]) -> Iterator[Dict[str, Union[str, int]]]:
+    """
+    Decode the records of a "p4 -G" output one at a time, as they are read from the stream (ex. a process' stdout).
+    """
+    while True:
+        try:
+            record = marshal.load(stream)
+        except EOFError:
+            break
+        except (ValueError, TypeError) as e:
+            log(Severity.ERROR, tool_name, f'Could not decode marshalled p4 output: {e}')
+            break
+        # p4 writes Python 2 strings, which are read as bytes
+        yield {key.decode(errors='replace') if isinstance(key, bytes) else key:
+               value.decode(errors='replace') if isinstance(value, bytes) else value
+               for key, value in record.items()}
+
+
+class P4FstatCache:
+    """
+    Cache of p4 fstat records, in memory and on disk (Blue Hole user cache dir), so repeated fstat of unchanged files
+    don't reach the server, even across sessions. A record is reused until:
+    - The local file's modification time changes;
+    - p4_fstat_cache_max_age is elapsed (others may have acted on the file);
+    - One of our own commands acts on the file (add, edit, sync, etc. see P4Session).
+    Records of files that are not on the server (no such file) are cached too.
+    Records are only valid for a given server & workspace (scope), which is set by get_p4_info.
+    Changes are kept in memory and written to disk once per fstat batch (see p4_fstat_records) and on exit, not on
+    every change.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__entry_dict: Dict[str, Dict[str, Any]] = {}
+        self.__scope: Optional[str] = None
+        self.__cache_file_path: Optional[Path] = None
+        self.__dirty: bool = False
+
+    def set_scope(self, scope: str, cache_file_path: Path):
+        """
+        Set the server & workspace records apply to. When it changes, records are loaded from disk (if they were saved
+        for that same scope).
+        """
+        with self.__lock:
+            if scope == self.__scope:
+                return
+            self.__save()  # Records of the previous scope
+            self.__scope = scope
+            self.__cache_file_path = cache_file_path
+            self.__entry_dict = {}
+            try:
+                with open(cache_file_path, encoding='utf-8') as cache_file:
+                    data = json.load(cache_file)
+                if data.get('scope') == scope:
+                    for entry in data.get('entries', []):
+                        for key in entry['key_lst']:
+                            self.__entry_dict[key] = entry
+            except (OSError, ValueError, KeyError, TypeError):
+                pass  # No (valid) cache on disk yet
+            log(Severity.DEBUG, tool_name, f'fstat cache: {len(self.__entry_dict)} key(s) loaded for "{scope}"')
+
+    def get(self, file_path: str) -> Optional[Dict[str, Union[str, int]]]:
+        """
+        Returns the cached record of a file (clientFile or depotFile), if still valid, else None.
+        """
+        with self.__lock:
+            entry = self.__entry_dict.get(normalize_path_key(file_path))
+        if entry is None:
             return None
-        elif ' - no such file(s).' in i:
-            result_dict = {'clientFile': i.replace(' - no such file(s).', '')}
-            result_dicts_lst.append(result_dict)
-            result_dict = {}
-        elif ' - file(s) not in client view.' in i:
-            result_dict = {'clientFile': i.replace(' - file(s) not in client view.', ''), 'notInClientView': True}
-            result_dicts_lst.append(result_dict)
-            result_dict = {}
-        else:
-            i = i.replace('... ', '')
-            if len(i) > 0:
-                split_i = i.split(' ')
-                split_i_up_to_last = ''
-                split_i_length = len(split_i)
-                for idx, value in enumerate(split_i):
-                    if idx > 0:
-                        if idx < split_i_length - 1:
-                            split_i_up_to_last += value + ' '
-                        else:
-                            split_i_up_to_last += value
-                result_dict[split_i[0]] = split_i_up_to_last
+        if time.time() - entry['time'] > p4_fstat_cache_max_age:
+            return None
+        if entry['mtime'] != self.__get_mtime(entry['client_file']):
+            return None
+        return entry['record']
+
+    def put(self, record_lst: List[Dict[str, Union[str, int]]]):
+        """
+        Cache the raw records of a "p4 -G fstat" (saved to disk on next save).
+        """
+        fetch_time = time.time()
+        with self.__lock:
+            if self.__scope is None:
+                return
+            for record in record_lst:
+                if record.get('code') == 'error':
+                    p4_error = P4Error(record)
+                    if p4_error.error_type not in [P4ErrorType.NO_SUCH_FILE, P4ErrorType.NOT_IN_CLIENT_VIEW]:
+                        continue
+                    path_lst = [p4_error.file_path]
+                    client_file = p4_error.file_path if p4_error.get_file_path_key() == 'clientFile' else None
+                else:
+                    path_lst = [record.get('clientFile'), record.get('depotFile')]
+                    client_file = record.get('clientFile')
+                entry = {'record': record,
+                         'client_file': client_file,
+                         'mtime': self.__get_mtime(client_file),
+                         'time': fetch_time,
+                         'key_lst': [normalize_path_key(path) for path in path_lst if path is not None]}
+                self.__drop_entries(entry['key_lst'])
+                for key in entry['key_lst']:
+                    self.__entry_dict[key] = entry
+            self.__dirty = True
+
+    def invalidate(self, file_path_lst: Optional[Iterable[str]] = None):
+        """
+        Forget the records of files (clientFile or depotFile). Forgets all of them if None.
+        """
+        with self.__lock:
+            if file_path_lst is None:
+                self.__entry_dict = {}
             else:
-                result_dicts_lst.append(result_dict)
-                result_dict = {}
+                self.__drop_entries([normalize_path_key(file_path) for file_path in file_path_lst])
+            self.__dirty = True
+
+    def save(self):
+        """
+        Write the records to disk, if they changed since last saved.
+        """
+        with self.__lock:
+            self.__save()
+
+    def __drop_entries(self, key_lst: List[str]):
+        """
+        Drop the entries under these keys, including the other keys they are stored under (clientFile & depotFile)
+        """
+        for key in key_lst:
+            entry = self.__entry_dict.get(key)
+            if entry is not None:
+                for entry_key in entry['key_lst']:
+                    self.__entry_dict.pop(entry_key, None)
+
+    def __save(self):
+        if not self.__dirty or self.__cache_file_path is None:
+            return
+        self.__dirty = False
+        entry_lst = list({id(entry): entry for entry in self.__entry_dict.values()}.values())
+        tmp_file_path = f'{self.__cache_file_path}.tmp'
+        try:
+            with open(tmp_file_path, 'w', encoding='utf-8') as cache_file:
+                json.dump({'scope': self.__scope, 'entries': entry_lst}, cache_file)
+            os.replace(tmp_file_path, self.__cache_file_path)
+        except OSError as e:
+            log(Severity.WARNING, tool_name, f'Could not save fstat cache: {e}')
+
+    @staticmethod
+    def __get_mtime(client_file: Optional[str]) -> Optional[int]:
+        if client_file is None:
+            return None
+        try:
+            return os.stat(client_file).st_mtime_ns
+        except OSError:
+            return None  # Not on disk
+
+
+_P4_FSTAT_CACHE = P4FstatCache()
+atexit.register(_P4_FSTAT_CACHE.save)
+
+
+def get_p4_fstat_cache() -> P4FstatCache:
+    return _P4_FSTAT_CACHE
+
+
+def p4_fstat_records(file_path_lst: Iterable[str],
+                     use_cache: bool = True) -> List[Union[Dict[str, Union[str, int]], P4Error]]:
+    """
+    Get p4 fstat results for a list of files (a single p4 call), as typed results: a dict per file found, a P4Error
+    for every error.
+    :param use_cache: Reuse valid cached records (see P4FstatCache), so only the other files are sent to the server.
+                      Records fetched are cached either way.
+    """
+    p4_fstat_cache = get_p4_fstat_cache()
+    record_lst = []
+    fetch_lst = []
+    for file_path in file_path_lst:
+        record = p4_fstat_cache.get(file_path) if use_cache else None
+        if record is None:
+            fetch_lst.append(file_path)
+        else:
+            record_lst.append(record)
+    if len(record_lst) > 0:
+        log(Severity.DEBUG, tool_name, f'fstat cache: {len(record_lst)} hit(s), {len(fetch_lst)} file(s) to fetch')
+
+    if len(fetch_lst) > 0:
+        fetched_record_lst = p4_fstat_sharded(fetch_lst)
+        p4_fstat_cache.put(fetched_record_lst)
+        p4_fstat_cache.save()  # Once per batch, along with the invalidations of the commands since the last one
+        record_lst += fetched_record_lst
+    return [P4Error(record) if record.get('code') == 'error' else record for record in record_lst]
+
+
+def p4_fstat_sharded(file_path_lst: List[str]) -> List[Dict[str, Union[str, int]]]:
+    """
+    Raw "p4 -G fstat" records of a list of files. Lists larger than p4_fstat_shard_size are split in shards, fetched
+    in parallel (at most p4_fstat_max_concurrency at once). Records are merged in shard order, so the result is the
+    same as a single call.
+    """
+    p4_session = get_p4_session()
+    shard_lst = [file_path_lst[i:i + p4_fstat_shard_size] for i in range(0, len(file_path_lst), p4_fstat_shard_size)]
+    if len(shard_lst) <= 1:
+        return p4_session.run_marshal('p4 fstat', file_path_lst)
+
+    log(Severity.DEBUG, tool_name, f'fstat of {len(file_path_lst)} files in {len(shard_lst)} shards')
+    p4_session.get_p4_path()  # Resolve before spreading to threads
+    max_workers = max(1, min(p4_fstat_max_concurrency, len(shard_lst)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        shard_record_lst = executor.map(lambda shard: p4_session.run_marshal('p4 fstat', shard), shard_lst)
+        return [record for record_lst in shard_record_lst for record in record_lst]
+
+
+def p4_fstat_dict(file_path_lst: Union[str, Iterable[str]],
+                  silent_mode=False,
+                  use_cache: bool = True) -> Optional[List[Dict[str, str]]]:
+    """
+    Get p4 fstat results, cleaned as an array of dicts (1 dict per item)
+    """
+    if isinstance(file_path_lst, str):
+        file_path_lst = [file_path_lst]
+
+    result_dicts_lst = []
+    for record in p4_fstat_records(file_path_lst, use_cache):
+        if not isinstance(record, P4Error):
+            result_dicts_lst.append(record)
+            continue
+
+        match record.error_type:
+            case P4ErrorType.SESSION_EXPIRED:
+                if not silent_mode:
+                    msg = 'Your session has expired. Please login again from Perforce. Aborting!'
+                    log(Severity.ERROR, tool_name, msg, popup=True)
+                return None
+            case P4ErrorType.NO_SUCH_FILE:
+                result_dicts_lst.append({record.get_file_path_key(): record.file_path})
+            case P4ErrorType.NOT_IN_CLIENT_VIEW:
+                result_dicts_lst.append({record.get_file_path_key(): record.file_path, 'notInClientView': True})
+            case _:
+                log(Severity.ERROR, tool_name, record.message)
 
     return result_dicts_lst
 
@@ -870,6 +1228,50 @@ def get_p4_file_group_from_depot_file_lst(depot_file_lst: List[str]) -> P4FileGr
     return p4_file_group
 
 
+def stream_p4_files(dir_path: Optional[Union[str, Path]] = None,
+                    status_lst: Optional[List[P4FileStatus]] = None,
+                    progress_callback: Optional[Callable[[int], None]] = None,
+                    progress_interval: int = 1000) -> Iterator[P4File]:
+    """
+    Status scan of every file under a directory (the Source Content dir by default). P4Files are yielded as p4 outputs
+    them, so memory use doesn't grow with the number of files (ex. for stale or checked out by others reports on a
+    whole project). Stopping the iteration early stops p4.
+    :param dir_path: Local directory to scan, recursively ("<dir_path>/...")
+    :param status_lst: Only yield the P4Files with one of these statuses (all if None)
+    :param progress_callback: Called with the number of files scanned so far, every progress_interval files and once
+                              done
+    """
+    if dir_path is None:
+        dir_path = envPathResolver.get_valid_sc_dir_path()
+        if dir_path is None:
+            return
+
+    # Only ask for the fields P4File uses
+    field_str = ','.join(field for field in P4File.__slots__ if field not in ['status', 'file_name', 'notInClientView'])
+    file_spec = str(Path(dir_path, '...'))
+
+    scanned_counter = 0
+    for record in get_p4_session().stream_marshal(f'p4 fstat -T {field_str}', [file_spec]):
+        if record.get('code') == 'error':
+            p4_error = P4Error(record)
+            if p4_error.error_type is not P4ErrorType.NO_SUCH_FILE:  # Empty dir is not an error
+                log(Severity.ERROR, tool_name, p4_error.message)
+            continue
+
+        scanned_counter += 1
+        if progress_callback is not None and scanned_counter % progress_interval == 0:
+            progress_callback(scanned_counter)
+
+        p4_file = P4File(client_file=record.get('clientFile'), depot_file=record.get('depotFile'))
+        p4_file.update_fields(record)
+        if status_lst is None or p4_file.status in status_lst:
+            yield p4_file
+
+    if progress_callback is not None:
+        progress_callback(scanned_counter)
+    log(Severity.DEBUG, tool_name, f'Scanned {scanned_counter} file(s) under "{dir_path}"')
+
+
 def get_p4_file_group_from_client_file_lst(client_file_lst: List[str]) -> P4FileGroup:
     """
     From a list of client file paths (Perforce-type paths), returns a P4FileGroup (with updated fields)
@@ -904,8 +1306,8 @@ def dialog_box_p4_info():
     if not check_result:
         return False
 
-    # If can connect to perforce, proceed.
-    p4_info_cls = P4Info()
+    # If can connect to perforce, proceed (explicitly asked by user, so always show fresh info)
+    p4_info_cls = get_p4_info(force_refresh=True)
     msg = (f'User name: {p4_info_cls.user_name}\n'
            f'Client name: {p4_info_cls.client_name}\n'
            f'Client root: {p4_info_cls.client_root}\n'
@@ -916,12 +1318,80 @@ def dialog_box_p4_info():
     return True
 
 
+_P4_INFO: Optional[P4Info] = None
+_P4_INFO_TIME: float = 0.0
+_P4_INFO_ENV_SETTINGS: Optional[Tuple] = None
+
+
+def get_p4_env_settings() -> Tuple:
+    """
+    Returns the Perforce related preferences (connection settings & p4 path). When they change, the cached P4Info is
+    not valid anymore.
+    """
+    sc = prefs().sc
+    return (sc.source_control_enable, sc.source_control_solution, sc.win32_env_override,
+            sc.win32_env_setting_p4port, sc.win32_env_setting_p4user, sc.win32_env_setting_p4client,
+            sc.macos_env_setting_p4port, sc.macos_env_setting_p4user, sc.macos_env_setting_p4client,
+            sc.linux_env_setting_p4port, sc.linux_env_setting_p4user, sc.linux_env_setting_p4client,
+            sc.p4v_app_path_mac, sc.p4_parallel_path_linux)
+
+
+def get_p4_info(force_refresh: bool = False) -> P4Info:
+    """
+    Returns the session's P4Info. "p4 info" is only run again once p4_info_ttl is elapsed, or when the Perforce
+    preferences changed (in which case the P4 environment settings are also set again). Unsuccessful results are not
+    kept, so the next call tries to connect again.
+    :param force_refresh: Always run "p4 info"
+    """
+    global _P4_INFO, _P4_INFO_TIME
+
+    # Set p4 env settings, only when they changed
+    update_p4_env_settings()
+
+    if force_refresh or _P4_INFO is None or time.monotonic() - _P4_INFO_TIME > p4_info_ttl:
+        p4_info_cls = P4Info()
+        if p4_info_cls.status is not True:
+            invalidate_p4_info()
+            return p4_info_cls
+        _P4_INFO = p4_info_cls
+        _P4_INFO_TIME = time.monotonic()
+        # fstat records only apply to this server & workspace
+        get_p4_fstat_cache().set_scope(f'{p4_info_cls.server_address}|{p4_info_cls.client_name}',
+                                       Path(blenderFile.get_blue_hole_user_cache_path(), 'p4_fstat_cache.json'))
+    else:
+        log(Severity.DEBUG, tool_name, 'Using cached p4 info')
+    return _P4_INFO
+
+
+def update_p4_env_settings():
+    """
+    Set P4 environment settings, only if the Perforce preferences changed since they were last set.
+    """
+    global _P4_INFO_ENV_SETTINGS
+    env_settings = get_p4_env_settings()
+    if env_settings != _P4_INFO_ENV_SETTINGS:
+        set_p4_env_settings()  # Also invalidates cached P4Info & p4 path
+        _P4_INFO_ENV_SETTINGS = env_settings
+
+
+def invalidate_p4_info():
+    """
+    Forget the cached P4Info, so next get_p4_info runs "p4 info" again.
+    """
+    global _P4_INFO
+    _P4_INFO = None
+
+
 def set_p4_env_settings():
     """
     Set Environment Variables, if configured in User Preferences
     """
     print('Initialize set P4 environment settings')
 
+    # Connection & p4 path may change, so cached p4 info & resolved p4 path are not valid anymore
+    invalidate_p4_info()
+    get_p4_session().reset()
+
     # If Source Control is enabled in the Preferences
     if filterUtils.filter_source_control() and prefs().sc.source_control_solution == 'perforce':
         print('Attempting to set P4 environment settings')
@@ -931,28 +1401,19 @@ def set_p4_env_settings():
                 # If preference set to "Override Environment Settings"
                 if prefs().sc.win32_env_override:
                     print('Override environment settings is ON')
-                    cmd_str = 'p4 set P4USER=' + prefs().sc.macos_env_setting_p4user
-                    exec_p4_command(cmd_str)
-                    cmd_str = 'p4 set P4PORT=' + prefs().sc.macos_env_setting_p4port
-                    exec_p4_command(cmd_str)
-                    cmd_str = 'p4 set P4CLIENT=' + prefs().sc.macos_env_setting_p4client
-                    exec_p4_command(cmd_str)
+                    exec_p4_command('p4 set', [f'P4USER={prefs().sc.macos_env_setting_p4user}'])
+                    exec_p4_command('p4 set', [f'P4PORT={prefs().sc.macos_env_setting_p4port}'])
+                    exec_p4_command('p4 set', [f'P4CLIENT={prefs().sc.macos_env_setting_p4client}'])
             case OS.MAC:
                 # If Platform is MacOS, Set automatically as the MacOS P4V Client doesn't have Environment Settings.
-                cmd_str = 'p4 set P4USER=' + prefs().sc.macos_env_setting_p4user
-                exec_p4_command(cmd_str)
-                cmd_str = 'p4 set P4PORT=' + prefs().sc.macos_env_setting_p4port
-                exec_p4_command(cmd_str)
-                cmd_str = 'p4 set P4CLIENT=' + prefs().sc.macos_env_setting_p4client
-                exec_p4_command(cmd_str)
+                exec_p4_command('p4 set', [f'P4USER={prefs().sc.macos_env_setting_p4user}'])
+                exec_p4_command('p4 set', [f'P4PORT={prefs().sc.macos_env_setting_p4port}'])
+                exec_p4_command('p4 set', [f'P4CLIENT={prefs().sc.macos_env_setting_p4client}'])
             case OS.LINUX:
                 # If Platform is Linux, Set automatically as the MacOS P4V Client doesn't have Environment Settings.
-                cmd_str = 'p4 set P4USER=' + prefs().sc.linux_env_setting_p4user
-                exec_p4_command(cmd_str)
-                cmd_str = 'p4 set P4PORT=' + prefs().sc.linux_env_setting_p4port
-                exec_p4_command(cmd_str)
-                cmd_str = 'p4 set P4CLIENT=' + prefs().sc.linux_env_setting_p4client
-                exec_p4_command(cmd_str)
+                exec_p4_command('p4 set', [f'P4USER={prefs().sc.linux_env_setting_p4user}'])
+                exec_p4_command('p4 set', [f'P4PORT={prefs().sc.linux_env_setting_p4port}'])
+                exec_p4_command('p4 set', [f'P4CLIENT={prefs().sc.linux_env_setting_p4client}'])
 
 class P4UserWorkspace:
     def __init__(self):
@@ -1127,10 +1588,188 @@ def get_p4_linux_path() -> str:
     return prefs().sc.p4_parallel_path_linux
 
 
-def exec_p4_command(command: str):
+class P4Session:
+    """
+    Long-lived Perforce session, shared for the whole Blender session (see get_p4_session).
+    Resolves the p4 executable once, then sends file arguments through a "p4 -x <argfile>" batch channel so a command
+    costs a single p4 process no matter how many files it applies to. Requests can also be queued and
+    flushed together, which pipelines the add/sync/edit steps of a checkout.
+    """
+
+    def __init__(self):
+        self.__p4_path: Optional[str] = None
+        self.__p4_pref_path: Optional[str] = None
+        self.__queue: Dict[str, List[str]] = {}
+
+    def get_p4_path(self) -> str:
+        """
+        Resolve P4 Path (macOS & Linux need to be pointed to p4_parallel file). Only validated once per session.
+        """
+        if self.__p4_path is not None:
+            return self.__p4_path
+
+        p4_path: str = {OS.WIN: 'p4', OS.MAC: get_p4_macos_path(), OS.LINUX: get_p4_linux_path()}[get_os()]
+
+        # Resolved through the shared executable registry, so validation (and permissions on macOS & Linux, where
+        # p4_parallel needs to be executable) only happen once, until the path changes in the preferences.
+        resolved_path = cmdShellWrapper.resolve_executable(p4_path, make_executable=get_os() in [OS.MAC, OS.LINUX])
+        if resolved_path is None:
+            match get_os():
+                case OS.MAC | OS.LINUX:
+                    # p4_parallel path needs to be valid
+                    msg = (f'P4 Parallel path "{p4_path}" is invalid. Verify that Perforce is installed and, if '
+                           f'required, update this Path in the Blue Hole addon settings (Source Control Tab).')
+                    log(Severity.CRITICAL, 'Perforce Command', msg)
+            resolved_path = p4_path  # Launch will fail with an explicit error
+
+        self.__p4_pref_path = p4_path
+        self.__p4_path = resolved_path
+        return self.__p4_path
+
+    def reset(self):
+        """
+        Forget the resolved executable and pending requests (ex. when Perforce preferences change).
+        """
+        if self.__p4_pref_path is not None:
+            cmdShellWrapper.clear_executable_cache(self.__p4_pref_path)
+        self.__p4_path = None
+        self.__p4_pref_path = None
+        self.__queue = {}
+
+    def run(self, command: str,
+            arg_lst: Optional[Iterable[str]] = None,
+            input_str: Optional[str] = None) -> List[str]:
+        """
+        Run a Perforce command once for all items of arg_lst, which are fed to p4 through an argument file ("-x").
+        :param command: Perforce command, starting with "p4 " (ex. "p4 sync -f")
+        :param arg_lst: File paths (clientFile or depotFile) the command applies to. If None, command is run as-is.
+        :param input_str: Text sent to the command's stdin (ex. a form, for commands using -i)
+        :return: Output lines (stdout, followed by stderr), like exec_p4_command
+        """
+        stdout, stderr = self.__exec(command, arg_lst, input_str)
+        output = stdout.decode(errors='replace') + stderr.decode(errors='replace')
+        return output.splitlines()
+
+    def run_marshal(self, command: str,
+                    arg_lst: Optional[Iterable[str]] = None,
+                    input_str: Optional[str] = None) -> List[Dict[str, Union[str, int]]]:
+        """
+        Same as run, but asks p4 for marshalled Python dicts (-G), so no text scraping is needed to read the result.
+        :return: One dict per record. Errors are records too, with their "code" key set to "error".
+        """
+        stdout, stderr = self.__exec(command, arg_lst, input_str, global_opt_lst=['-G'])
+        for line in stderr.decode(errors='replace').splitlines():
+            log(Severity.ERROR, tool_name, line)
+        return decode_marshal_records(stdout)
+
+    def stream_marshal(self, command: str, arg_lst: Optional[List[str]] = None) -> Iterator[Dict[str, Union[str, int]]]:
+        """
+        Same as run_marshal, but records are yielded while p4 outputs them instead of once it's done, for results too
+        large to be kept in memory. No timeout: p4 runs as long as the records are consumed.
+        :param arg_lst: Arguments added to the command line as is (ex. a "<dir>/..." file spec)
+        """
+        argv = [self.get_p4_path(), '-G'] + command.split()[1:] + ([] if arg_lst is None else arg_lst)
+        log(Severity.DEBUG, tool_name, f'Streaming: {command}')
+        with cmdShellWrapper.open_cmd_stream(argv) as stdout:
+            yield from iter_marshal_records(stdout)
+
+    def __exec(self, command: str,
+               arg_lst: Optional[Iterable[str]] = None,
+               input_str: Optional[str] = None,
+               global_opt_lst: Optional[List[str]] = None) -> Tuple[bytes, bytes]:
+        """
+        Launch p4 and return its raw (stdout, stderr)
+        """
+        if not command.startswith('p4 '):
+            msg = (f'Command fed to P4Session should always be Perforce commands (start with "p4 "), however '
+                   f'received "{command}" which does not meet this criteria.')
+            log(Severity.CRITICAL, 'Perforce Command', msg)
+
+        argv = [self.get_p4_path()]
+        if global_opt_lst is not None:
+            argv += global_opt_lst
+
+        # Arguments are written to an argument file (one per line), so there is no command-line length limit, no
+        # quoting of paths with spaces, and stdin stays free for the command's own input.
+        arg_file_path = None
+        if arg_lst is not None:
+            arg_lst = list(arg_lst)
+            if len(arg_lst) == 0:
+                return b'', b''  # Nothing to do
+            with tempfile.NamedTemporaryFile('w', prefix='bh_p4_args_', suffix='.txt', encoding='utf-8',
+                                             delete=False) as arg_file:
+                arg_file.write('\n'.join(arg_lst) + '\n')
+                arg_file_path = arg_file.name
+            argv += ['-x', arg_file_path]
+        argv += command.split()[1:]
+
+        arg_count = 0 if arg_lst is None else len(arg_lst)
+        log(Severity.DEBUG, tool_name, f'Executing batch: {command} ({arg_count} argument(s))')
+        try:
+            result = cmdShellWrapper.exec_cmd_result(argv,
+                                                     time_out=p4_batch_time_out,
+                                                     input_data=None if input_str is None else input_str.encode())
+        finally:
+            if arg_file_path is not None:
+                os.remove(arg_file_path)
+
+        # Commands acting on files make their cached fstat records outdated (all of them, if no file is given)
+        if command.split()[1] in _P4_FSTAT_INVALIDATING_CMD_LST:
+            get_p4_fstat_cache().invalidate(arg_lst)
+
+        if result.timed_out:
+            log(Severity.ERROR, tool_name, f'"{command}" timed out (no output for {p4_batch_time_out} seconds)!')
+            return b'', b''
+        return result.stdout, result.stderr
+
+    def run_concurrent(self, lane_lst: List[List[Tuple[str, List[str]]]]) -> List[List[List[str]]]:
+        """
+        Run lanes of requests concurrently, one thread per lane. The requests of a lane run one after the other, so
+        requests that depend on each other (ex. sync, then edit of the same files) must share a lane.
+        :param lane_lst: Lanes, each a list of (command, arg_lst) requests
+        :return: Output lines of every request, in the same layout as lane_lst
+        """
+        self.get_p4_path()  # Resolve before spreading to threads
+
+        def run_lane(lane: List[Tuple[str, List[str]]]) -> List[List[str]]:
+            return [self.run(command, arg_lst) for command, arg_lst in lane]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(lane_lst))) as executor:
+            return list(executor.map(run_lane, lane_lst))
+
+    def queue(self, command: str, arg: str):
+        """
+        Queue a request, sent on next flush. Requests for the same command are merged into a single p4 call.
+        """
+        self.__queue.setdefault(command, []).append(arg)
+
+    def flush(self) -> Dict[str, List[str]]:
+        """
+        Send queued requests: one p4 process per command, in the order the commands were first queued.
+        :return: Output lines for each command
+        """
+        queue, self.__queue = self.__queue, {}
+        return {command: self.run(command, arg_lst) for command, arg_lst in queue.items()}
+
+
+_P4_FSTAT_INVALIDATING_CMD_LST = ['add', 'edit', 'sync', 'reopen', 'revert', 'submit', 'delete', 'move', 'lock',
+                                   'unlock', 'resolve']
+_P4_SESSION: Optional[P4Session] = None
+
+
+def get_p4_session() -> P4Session:
+    global _P4_SESSION
+    if _P4_SESSION is None:
+        _P4_SESSION = P4Session()
+    return _P4_SESSION
+
+
+def exec_p4_command(command: str, arg_lst: Optional[List[str]] = None):
     """
-    Execute Perforce commands. Based on cmdShellWrapper's exec_cmd,
-    but with a few specific things to ensure proper functioning on macOS and Linux.
+    Execute Perforce commands. Based on cmdShellWrapper's exec_cmd, but p4 is exec'd directly (argument list, no
+    shell), so the resolved p4 path and arguments never need quoting (ex. paths with spaces on macOS & Linux).
+    :param command: Perforce command, starting with "p4 " (ex. "p4 info"). Split on spaces.
+    :param arg_lst: Extra arguments, passed as is (ex. a file path or a "P4USER=name" value)
     """
 
     # Ensures this is used for Perforce commands, else raise exception and recommend using wrapper directly.
@@ -1139,22 +1778,10 @@ def exec_p4_command(command: str):
                f'received "{command}" which does not meet this criteria.')
         log(Severity.CRITICAL, 'Perforce Command', msg)
 
-    # Resolve P4 Path (macOS & Linux need to be pointed to p4_parallel file)
-    p4_path: str = {OS.WIN: 'p4', OS.MAC: get_p4_macos_path(), OS.LINUX: get_p4_linux_path()}[get_os()]
-
-    match get_os():
-        case OS.MAC | OS.LINUX:
-            # p4_parallel path needs to be valid
-            if not os.path.isfile(p4_path):
-                msg = (f'P4 Parallel path "{p4_path}" is invalid. Verify that Perforce is installed and, if required, '
-                       f'update this Path in the Blue Hole addon settings (Source Control Tab).')
-                log(Severity.CRITICAL, 'Perforce Command', msg)
-
-            # Set permissions
-            cmdShellWrapper.exec_cmd(f'chmod +x "{p4_path}"')
-
-            # Replace p4 in command with the path (in quotes)
-            command = f'"{p4_path}"{command[2:]}'
+    # Resolve P4 Path (resolved & validated once per session)
+    argv: List[str] = [get_p4_session().get_p4_path()] + command.split()[1:]
+    if arg_lst is not None:
+        argv += arg_lst
 
     # Execute the command
-    return cmdShellWrapper.exec_cmd(command, time_out=15)
+    return cmdShellWrapper.exec_cmd(argv, time_out=15)